@@ -25,6 +25,7 @@ from whatsapp_messenger import WhatsAppMessenger
 from conversation_memory import ConversationMemory
 import calculator
 import navigation
+from geocoding import GeocodingService
 from wish_me import wishme
 from password_manager import PasswordManager, ScreenLock
 from features import Features
@@ -43,6 +44,7 @@ whatsapp_messenger = WhatsAppMessenger()
 memory = ConversationMemory()
 features = Features()
 health_reminders = HealthReminders()
+geocoder = GeocodingService()
 load_dotenv()
 
 
@@ -1216,24 +1218,15 @@ if __name__ == "__main__":
                     location1 = match.group(1)
                     location2 = match.group(2)
                 
-                # First get coordinates for both locations
-                    import requests
-                
+                # First get coordinates for both locations (cached places skip the network)
                     try:
-                        url1 = f"https://nominatim.openstreetmap.org/search?format=json&q={location1}"
-                        url2 = f"https://nominatim.openstreetmap.org/search?format=json&q={location2}"
-                    
-                        response1 = requests.get(url1)
-                        response2 = requests.get(url2)
-                    
-                        data1 = response1.json()
-                        data2 = response2.json()
+                        coords = geocoder.geocode_many([location1, location2])
+                        coords1 = coords.get(location1)
+                        coords2 = coords.get(location2)
                     
-                        if data1 and data2:
-                            lat1 = float(data1[0]["lat"])
-                            lon1 = float(data1[0]["lon"])
-                            lat2 = float(data2[0]["lat"])
-                            lon2 = float(data2[0]["lon"])
+                        if coords1 and coords2:
+                            lat1, lon1 = coords1
+                            lat2, lon2 = coords2
                         
                             distance = navigation.calculate_distance(lat1, lon1, lat2, lon2)
                             speak(f"The distance between {location1} and {location2} is {distance:.2f} kilometers.")
@@ -0,0 +1,168 @@
+# a2a_benchmark.py
+"""
+Throughput and latency benchmark for A2A messaging between two local agents.
+Compares the legacy transport (one TCP connection per message, read until
+EOF) with the persistent framed connection used by A2AAgent, and with the
+in-process path A2AManager uses between agents it registered itself.
+
+Usage: python a2a_benchmark.py [--messages N] [--senders N] [--port P]
+                               [--server-mode threads|asyncio]
+"""
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from a2a_protocol import A2AAgent, A2AManager, A2AMessage, MessageType
+
+
+class DeliveryRecorder:
+    """COMMAND handler that records one-way delivery latency"""
+
+    def __init__(self, expected: int, reply: bool):
+        self.expected = expected
+        self.reply = reply
+        self.latencies = []
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def __call__(self, message: A2AMessage):
+        latency = time.time() - message.timestamp
+        with self.lock:
+            self.latencies.append(latency)
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+        return {'status': 'success'} if self.reply else None
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(int(len(ordered) * fraction), len(ordered) - 1)
+    return ordered[index]
+
+
+def legacy_send(host, port, message: A2AMessage):
+    """The old transport: connect, send one JSON document, close"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.connect((host, port))
+        sock.sendall(json.dumps(message.to_dict()).encode('utf-8'))
+    finally:
+        sock.close()
+
+
+def run_legacy(sender, receiver, messages, senders):
+    recorder = DeliveryRecorder(messages, reply=False)
+    receiver.register_handler(MessageType.COMMAND, recorder)
+
+    def send(i):
+        message = sender._build_message(receiver.agent_id, MessageType.COMMAND, {'command': f'ping {i}'})
+        legacy_send(receiver.host, receiver.port, message)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=senders) as pool:
+        list(pool.map(send, range(messages)))
+    recorder.done.wait(timeout=60)
+    elapsed = time.perf_counter() - started
+    return len(recorder.latencies) / elapsed, recorder.latencies
+
+
+def run_persistent(sender, receiver, messages, senders):
+    recorder = DeliveryRecorder(messages, reply=False)
+    receiver.register_handler(MessageType.COMMAND, recorder)
+
+    def send(i):
+        sender.send_message(receiver.agent_id, MessageType.COMMAND, {'command': f'ping {i}'})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=senders) as pool:
+        list(pool.map(send, range(messages)))
+    recorder.done.wait(timeout=60)
+    elapsed = time.perf_counter() - started
+    return len(recorder.latencies) / elapsed, recorder.latencies
+
+
+def run_requests(sender, receiver, messages, senders):
+    recorder = DeliveryRecorder(messages, reply=True)
+    receiver.register_handler(MessageType.COMMAND, recorder)
+    latencies = []
+    lock = threading.Lock()
+
+    def request(i):
+        started = time.perf_counter()
+        response = sender.request(receiver.agent_id, MessageType.COMMAND, {'command': f'ping {i}'})
+        if response is not None:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=senders) as pool:
+        wait([pool.submit(request, i) for i in range(messages)])
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies
+
+
+def report(label, rate, latencies):
+    print(f"{label:<34} {rate:>10,.0f} msgs/sec   "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.2f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms")
+
+
+def main(argv):
+    messages = 2000
+    senders = 8
+    port = 8750
+    server_mode = 'threads'
+    args = list(argv)
+    if '--server-mode' in args:
+        index = args.index('--server-mode')
+        server_mode = args[index + 1]
+        del args[index:index + 2]
+    for flag in ('--messages', '--senders', '--port'):
+        if flag in args:
+            index = args.index(flag)
+            value = int(args[index + 1])
+            del args[index:index + 2]
+            if flag == '--messages':
+                messages = value
+            elif flag == '--senders':
+                senders = value
+            else:
+                port = value
+
+    sender = A2AAgent('bench_sender', port=port, verbose=False, server_mode=server_mode)
+    receiver = A2AAgent('bench_receiver', port=port + 1, verbose=False, server_mode=server_mode)
+    sender.add_peer(receiver.agent_id, receiver.host, receiver.port)
+    receiver.add_peer(sender.agent_id, sender.host, sender.port)
+    sender.start()
+    receiver.start()
+    time.sleep(0.2)
+
+    try:
+        print(f"{messages} messages from {senders} sender threads, {server_mode} server")
+        report("Legacy connect-per-message", *run_legacy(sender, receiver, messages, senders))
+        report("Persistent connection (one-way)", *run_persistent(sender, receiver, messages, senders))
+        report("Persistent request/response", *run_requests(sender, receiver, messages, senders))
+    finally:
+        sender.stop()
+        receiver.stop()
+
+    manager = A2AManager()
+    local_sender = manager.register_agent('bench_local_sender', 'benchmark', port=port + 2)
+    local_receiver = manager.register_agent('bench_local_receiver', 'benchmark', port=port + 3)
+    for agent in (local_sender, local_receiver):
+        agent.verbose = False
+    manager.start_all_agents()
+    try:
+        report("In-process request/response", *run_requests(local_sender, local_receiver, messages, senders))
+    finally:
+        local_sender.stop()
+        local_receiver.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
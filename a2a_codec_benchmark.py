@@ -0,0 +1,66 @@
+# a2a_codec_benchmark.py
+"""
+Compares the A2A wire codecs: encode and decode throughput and the size of
+each encoded message. Codecs that are not available (msgpack not
+installed) are skipped.
+
+Usage: python a2a_codec_benchmark.py [--rounds N]
+"""
+import sys
+import time
+import uuid
+
+from a2a_protocol import CODECS, A2AMessage, MessageType
+
+SAMPLE_MESSAGES = [
+    A2AMessage(str(uuid.uuid4()), 'optimus_prime', 'scraper_agent', MessageType.COMMAND,
+               {'command': 'scrape', 'parameters': {'url': 'https://example.com', 'depth': 2}},
+               time.time()),
+    A2AMessage(str(uuid.uuid4()), 'scraper_agent', 'optimus_prime', MessageType.RESPONSE,
+               {'response': {'status': 'success', 'result': 'Command executed', 'execution_time': 0.0123},
+                'original_message_id': str(uuid.uuid4())},
+               time.time(), correlation_id=str(uuid.uuid4())),
+    A2AMessage(str(uuid.uuid4()), 'optimus_prime', 'code_agent', MessageType.HEARTBEAT,
+               {'agent_id': 'optimus_prime'}, time.time()),
+    A2AMessage(str(uuid.uuid4()), 'code_agent', 'optimus_prime', MessageType.DATA,
+               {'rows': [{'id': i, 'name': f'item {i}', 'score': i * 0.5} for i in range(20)]},
+               time.time()),
+]
+
+
+def measure(codec, messages, rounds):
+    encoded = [codec.encode(message) for message in messages]
+    decoded = [codec.decode(payload) for payload in encoded]
+    if decoded != messages:
+        raise AssertionError(f"{codec.name} does not round-trip")
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            codec.encode(message)
+    encode_rate = rounds * len(messages) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for payload in encoded:
+            codec.decode(payload)
+    decode_rate = rounds * len(messages) / (time.perf_counter() - started)
+
+    average_size = sum(len(payload) for payload in encoded) / len(encoded)
+    return encode_rate, decode_rate, average_size
+
+
+def main(argv):
+    rounds = 20000
+    if '--rounds' in argv:
+        rounds = int(argv[argv.index('--rounds') + 1])
+
+    print(f"{len(SAMPLE_MESSAGES)} sample messages x {rounds} rounds")
+    print(f"{'codec':<10} {'encode/sec':>12} {'decode/sec':>12} {'avg bytes':>10}")
+    for name, codec in CODECS.items():
+        encode_rate, decode_rate, average_size = measure(codec, SAMPLE_MESSAGES, rounds)
+        print(f"{name:<10} {encode_rate:>12,.0f} {decode_rate:>12,.0f} {average_size:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
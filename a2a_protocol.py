@@ -1,12 +1,67 @@
 # a2a_protocol.py
+import asyncio
+import heapq
 import json
+import queue
+import random
 import socket
+import struct
 import threading
 import time
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+import uuid
+from concurrent.futures import (Future, InvalidStateError, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeoutError, wait)
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Sequence
 from enum import Enum
 
+from agent_registry import AgentRegistry
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Every message on the wire is a 4-byte big-endian length followed by the payload
+FRAME_HEADER = struct.Struct('!I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+CONNECT_TIMEOUT = 5.0
+
+# Server implementations: a thread per connection, or one asyncio event loop for all of them
+SERVER_MODES = ('threads', 'asyncio')
+
+HEARTBEAT_INTERVAL = 30.0
+BROADCAST_TIMEOUT = 2.0
+BROADCAST_WORKERS = 32
+
+# Unreachable peers are skipped by broadcasts for a backoff that doubles per failure
+SUSPEND_BASE = 1.0
+SUSPEND_MAX = 300.0
+
+# Received messages wait in a bounded inbox for the handler workers. When it
+# is full the network reader waits up to INBOX_PUT_TIMEOUT (which stops
+# reading from the sender), then rejects the message with an ERROR reply
+# that tells the sender to retry after INBOX_RETRY_AFTER seconds.
+INBOX_SIZE = 1000
+INBOX_PUT_TIMEOUT = 0.5
+INBOX_RETRY_AFTER = 1.0
+MESSAGE_HISTORY = 200
+LATENCY_SAMPLES = 256
+
+# Codec negotiation: the connecting side may open with an offer frame listing
+# codec names in preference order; the server answers with the one it picked.
+# Connections that start with an ordinary message use JSON.
+CODEC_OFFER = b'A2A?'
+CODEC_ACCEPT = b'A2A!'
+
+class A2ACallError(Exception):
+    """The remote agent answered a call with an ERROR message"""
+    
+    def __init__(self, message: str, content: Optional[Dict] = None):
+        super().__init__(message)
+        self.content = content or {}
+
 class MessageType(Enum):
     """A2A Protocol message types"""
     COMMAND = "command"
@@ -16,16 +71,35 @@ class MessageType(Enum):
     HEARTBEAT = "heartbeat"
     DATA = "data"
 
-@dataclass
 class A2AMessage:
-    """A2A Protocol message structure"""
-    message_id: str
-    sender: str
-    receiver: str
-    message_type: MessageType
-    content: Dict[str, Any]
-    timestamp: float
-    correlation_id: Optional[str] = None
+    """
+    A2A Protocol message structure.
+    Declares __slots__ by hand (dataclass(slots=True) needs Python 3.10)
+    to keep per-message memory and attribute access cheap.
+    """
+    __slots__ = ('message_id', 'sender', 'receiver', 'message_type', 'content', 'timestamp',
+                 'correlation_id')
+    
+    def __init__(self, message_id: str, sender: str, receiver: str, message_type: MessageType,
+                 content: Dict[str, Any], timestamp: float, correlation_id: Optional[str] = None):
+        self.message_id = message_id
+        self.sender = sender
+        self.receiver = receiver
+        self.message_type = message_type
+        self.content = content
+        self.timestamp = timestamp
+        self.correlation_id = correlation_id
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    __hash__ = None  # Mutable, like the dataclass it replaces
+    
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
     
     def to_dict(self):
         return {
@@ -50,20 +124,315 @@ class A2AMessage:
             correlation_id=data.get('correlation_id')
         )
 
+@dataclass
+class PeerHealth:
+    """What an agent knows about one peer's liveness"""
+    last_seen: float = 0.0  # wall-clock time we (or a gossiping peer) last heard from it
+    rtt: Optional[float] = None  # seconds, smoothed over heartbeat round trips
+    failures: int = 0  # consecutive delivery failures
+    suspended_until: float = 0.0
+    
+    def is_suspended(self, now: float) -> bool:
+        return self.suspended_until > now
+
+class JSONCodec:
+    """The original wire format: one JSON object per message"""
+    name = 'json'
+    
+    def encode(self, message: A2AMessage) -> bytes:
+        return json.dumps(message.to_dict()).encode('utf-8')
+    
+    def decode(self, payload) -> A2AMessage:
+        return A2AMessage.from_dict(json.loads(payload))
+
+class StructCodec:
+    """
+    Compact binary format: a fixed struct header (schema version, message
+    type code, flags, timestamp, field lengths), the string fields, then
+    the content. UUID message ids travel as 16 raw bytes.
+    """
+    name = 'struct'
+    SCHEMA_VERSION = 1
+    # version, type code, flags, timestamp, len(sender), len(receiver), len(message_id), len(correlation_id)
+    HEADER = struct.Struct('!BBBdHHHH')
+    
+    ID_IS_UUID = 1
+    HAS_CORRELATION = 2
+    CORRELATION_IS_UUID = 4
+    
+    TYPE_CODES = {message_type: code for code, message_type in enumerate(MessageType)}
+    TYPES = list(MessageType)
+    
+    def encode(self, message: A2AMessage) -> bytes:
+        flags = 0
+        message_id, is_uuid = self._pack_id(message.message_id)
+        if is_uuid:
+            flags |= self.ID_IS_UUID
+        
+        correlation_id = b''
+        if message.correlation_id is not None:
+            flags |= self.HAS_CORRELATION
+            correlation_id, is_uuid = self._pack_id(message.correlation_id)
+            if is_uuid:
+                flags |= self.CORRELATION_IS_UUID
+        
+        sender = message.sender.encode('utf-8')
+        receiver = message.receiver.encode('utf-8')
+        header = self.HEADER.pack(
+            self.SCHEMA_VERSION, self.TYPE_CODES[message.message_type], flags, message.timestamp,
+            len(sender), len(receiver), len(message_id), len(correlation_id)
+        )
+        return b''.join((header, sender, receiver, message_id, correlation_id,
+                         self.dump_content(message.content)))
+    
+    def decode(self, payload) -> A2AMessage:
+        view = memoryview(payload)
+        (version, type_code, flags, timestamp,
+         sender_len, receiver_len, id_len, correlation_len) = self.HEADER.unpack_from(view)
+        if version != self.SCHEMA_VERSION:
+            raise ValueError(f"Unsupported {self.name} schema version {version}")
+        
+        offset = self.HEADER.size
+        sender = str(view[offset:offset + sender_len], 'utf-8')
+        offset += sender_len
+        receiver = str(view[offset:offset + receiver_len], 'utf-8')
+        offset += receiver_len
+        message_id = self._unpack_id(view[offset:offset + id_len], flags & self.ID_IS_UUID)
+        offset += id_len
+        correlation_id = None
+        if flags & self.HAS_CORRELATION:
+            correlation_id = self._unpack_id(view[offset:offset + correlation_len],
+                                             flags & self.CORRELATION_IS_UUID)
+            offset += correlation_len
+        
+        return A2AMessage(message_id, sender, receiver, self.TYPES[type_code],
+                          self.load_content(view[offset:]), timestamp, correlation_id)
+    
+    def dump_content(self, content: Dict) -> bytes:
+        return json.dumps(content, separators=(',', ':')).encode('utf-8')
+    
+    def load_content(self, data: memoryview) -> Dict:
+        return json.loads(bytes(data))
+    
+    @staticmethod
+    def _pack_id(value: str):
+        # Only canonical lowercase UUID strings are packed, so decoding reproduces them exactly
+        if len(value) == 36 and value[8] == value[13] == value[18] == value[23] == '-':
+            digits = value.replace('-', '')
+            if digits.islower() or digits.isdigit():
+                try:
+                    packed = bytes.fromhex(digits)
+                    if len(packed) == 16:
+                        return packed, True
+                except ValueError:
+                    pass
+        return value.encode('utf-8'), False
+    
+    @staticmethod
+    def _unpack_id(data: memoryview, is_uuid: int) -> str:
+        if is_uuid:
+            digits = data.hex()
+            return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+        return str(data, 'utf-8')
+
+class MsgpackCodec(StructCodec):
+    """StructCodec with msgpack-encoded content; available when msgpack is installed"""
+    name = 'msgpack'
+    
+    def dump_content(self, content: Dict) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+    
+    def load_content(self, data: memoryview) -> Dict:
+        return msgpack.unpackb(data, raw=False)
+
+JSON_CODEC = JSONCodec()
+CODECS = {codec.name: codec for codec in (JSON_CODEC, StructCodec())}
+if msgpack is not None:
+    CODECS[MsgpackCodec.name] = MsgpackCodec()
+
+def choose_codec(offer: bytes):
+    """Pick the first offered codec we support, falling back to JSON"""
+    for name in bytes(offer[len(CODEC_OFFER):]).decode('ascii', 'replace').split(','):
+        if name in CODECS:
+            return CODECS[name]
+    return JSON_CODEC
+
+def _settle(future: Future, result=None, exception: Optional[BaseException] = None):
+    """Resolve a future unless it already finished or was cancelled"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+def encode_frame(message: A2AMessage, codec=JSON_CODEC) -> bytes:
+    """Serialise a message as a length-prefixed frame"""
+    payload = codec.encode(message)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def _frame_bytes(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytearray]:
+    """Read exactly `size` bytes, or return None if the peer closed the stream"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            return None
+        received += count
+    return buffer
+
+class FramedConnection:
+    """
+    A long-lived A2A stream carrying length-prefixed messages.
+    Sends are serialised with a lock so several threads can share it.
+    """
+    
+    def __init__(self, sock: socket.socket, codec=JSON_CODEC):
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.codec = codec
+        self.closed = False
+        self._send_lock = threading.Lock()
+    
+    @classmethod
+    def connect(cls, host: str, port: int, timeout: float = CONNECT_TIMEOUT,
+                codecs: Sequence[str] = ('json',)):
+        """Open a connection, negotiating a codec unless only JSON is wanted"""
+        sock = socket.create_connection((host, port), timeout=timeout)
+        connection = cls(sock)
+        try:
+            if list(codecs) != [JSON_CODEC.name]:
+                sock.sendall(_frame_bytes(CODEC_OFFER + ','.join(codecs).encode('ascii')))
+                answer = connection.read_frame()
+                if answer is None or not answer.startswith(CODEC_ACCEPT):
+                    raise ConnectionError(f"No codec answer from {host}:{port}")
+                connection.codec = CODECS.get(bytes(answer[len(CODEC_ACCEPT):]).decode('ascii'), JSON_CODEC)
+        except Exception:
+            connection.close()
+            raise
+        sock.settimeout(None)
+        return connection
+    
+    def accept_codec(self, offer: bytes):
+        """Server side of negotiation: answer an offer frame and switch codec"""
+        self.codec = choose_codec(offer)
+        with self._send_lock:
+            self.sock.sendall(_frame_bytes(CODEC_ACCEPT + self.codec.name.encode('ascii')))
+    
+    def send_message(self, message: A2AMessage):
+        frame = encode_frame(message, self.codec)
+        with self._send_lock:
+            self.sock.sendall(frame)
+    
+    def read_frame(self) -> Optional[bytearray]:
+        """Block until the next frame arrives; None when the stream ends"""
+        header = _recv_exact(self.sock, FRAME_HEADER.size)
+        if header is None:
+            return None
+        return self.read_payload(FRAME_HEADER.unpack(header)[0])
+    
+    def read_payload(self, length: int) -> Optional[bytearray]:
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {length} bytes exceeds limit")
+        return _recv_exact(self.sock, length)
+    
+    def read_message(self) -> Optional[A2AMessage]:
+        """Block until the next message arrives; None when the stream ends"""
+        payload = self.read_frame()
+        if payload is None:
+            return None
+        return self.codec.decode(payload)
+    
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
 class A2AAgent:
     """
-    Agent-to-Agent communication protocol implementation
+    Agent-to-Agent communication protocol implementation.
+    Received messages go through a bounded inbox to max_concurrency
+    handler workers. server_mode='asyncio' serves every inbound
+    connection from a single event loop thread; the default 'threads'
+    mode uses a thread per connection.
+    `codecs` lists the wire formats offered on outbound connections in
+    order of preference (see CODECS); inbound connections accept any.
+    With gossip_fanout set, each heartbeat round goes to that many random
+    peers and carries our peer table, instead of going to every peer.
+    port=0 binds an OS-assigned port. With a registry the agent publishes
+    itself while running and resolves unknown peers through it on first use.
     """
     
-    def __init__(self, agent_id: str, host: str = 'localhost', port: int = 8000):
+    def __init__(self, agent_id: str, host: str = 'localhost', port: int = 8000, verbose: bool = True,
+                 server_mode: str = 'threads', max_concurrency: int = 8, inbox_size: int = INBOX_SIZE,
+                 codecs: Sequence[str] = ('json',), gossip_fanout: Optional[int] = None,
+                 registry: Optional[AgentRegistry] = None, agent_type: Optional[str] = None,
+                 capabilities: Sequence[str] = ()):
+        if server_mode not in SERVER_MODES:
+            raise ValueError(f"Unknown server mode: {server_mode}")
         self.agent_id = agent_id
         self.host = host
         self.port = port
+        self.verbose = verbose
+        self.server_mode = server_mode
+        self.max_concurrency = max_concurrency
+        self.codecs = [name for name in codecs if name in CODECS] or [JSON_CODEC.name]
+        self.gossip_fanout = gossip_fanout
+        self.registry = registry
+        self.agent_type = agent_type
+        self.capabilities = list(capabilities)
+        self._bound = threading.Event()
         self.peers = {}  # agent_id -> (host, port)
+        self._resolved = set()  # peers whose address came from the registry
+        self.peer_health = {}  # agent_id -> PeerHealth
+        self._health_lock = threading.Lock()
+        self._broadcast_pool = None
         self.message_handlers = {}
         self.is_running = False
         self.server_socket = None
-        self.message_queue = []
+        self.started_at = None
+        
+        # Recently received messages, newest last
+        self.message_queue = deque(maxlen=MESSAGE_HISTORY)
+        
+        # Messages waiting for a handler worker: (message, reply)
+        self.inbox = queue.Queue(maxsize=inbox_size)
+        self._workers = []
+        self._inbox_high_water = 0
+        self._rejected = 0
+        self._handler_stats = {}  # message type -> latency stats
+        self._stats_lock = threading.Lock()
+        
+        # asyncio server state, only used when server_mode == 'asyncio'
+        self._loop = None
+        self._stop_event = None
+        self._async_writers = set()
+        
+        # Agents living in this process; messages to them skip the network
+        self.local_peers = {}  # agent_id -> A2AAgent
+        self.local_directory = None  # shared agent_id -> A2AAgent map for lazy local resolution
+        
+        # One persistent outbound connection per peer
+        self.connections = {}  # agent_id -> FramedConnection
+        self._inbound = set()  # connections accepted by our server
+        self._connect_locks = {}  # agent_id -> lock held while connecting
+        self._connections_lock = threading.Lock()
+        
+        # Requests waiting for a response, keyed by message_id
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._deadlines = []  # heap of (deadline, message_id) for requests with a timeout
+        self._deadline_cond = threading.Condition(self._pending_lock)
+        self._deadline_thread = None
         
         # Register default handlers
         self.register_handler(MessageType.COMMAND, self._handle_command)
@@ -75,70 +444,429 @@ class A2AAgent:
         self.message_handlers[message_type] = handler
     
     def add_peer(self, agent_id: str, host: str, port: int):
-        """Add another agent as a peer"""
+        """
+        Add another agent as a peer. A peer whose registry address was
+        forgotten after a failure keeps its health record, and with it
+        any suspension, when it is resolved again.
+        """
+        previous = self.peers.get(agent_id)
+        if previous != (host, port):
+            self._drop_connection(agent_id)
+            with self._health_lock:
+                if previous is not None or agent_id not in self.peer_health:
+                    self.peer_health[agent_id] = PeerHealth()
         self.peers[agent_id] = (host, port)
     
+    def add_local_peer(self, agent: 'A2AAgent'):
+        """
+        Add a peer running in this process. Messages to it are handed
+        straight to its inbox as objects (content is shared, not copied).
+        """
+        self.local_peers[agent.agent_id] = agent
+        self.add_peer(agent.agent_id, agent.host, agent.port)
+    
+    def get_peer_health(self) -> Dict[str, Dict]:
+        """Snapshot of the peer health table"""
+        with self._health_lock:
+            return {peer: asdict(health) for peer, health in self.peer_health.items()}
+    
     def start(self):
         """Start the A2A server"""
         self.is_running = True
+        self.started_at = time.time()
         
-        # Start server thread
+        # Start handler workers
+        self._workers = []
+        for i in range(self.max_concurrency):
+            worker = threading.Thread(target=self._run_worker, name=f"a2a_{self.agent_id}_worker_{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+        
+        # Start server thread and wait until it is listening, so an OS-assigned port is known
+        self._bound.clear()
         server_thread = threading.Thread(target=self._run_server)
         server_thread.daemon = True
         server_thread.start()
+        self._bound.wait(CONNECT_TIMEOUT)
         
         # Start heartbeat thread
         heartbeat_thread = threading.Thread(target=self._send_heartbeats)
         heartbeat_thread.daemon = True
         heartbeat_thread.start()
         
+        if self.registry is not None:
+            self._publish()
+            registry_thread = threading.Thread(target=self._refresh_registration)
+            registry_thread.daemon = True
+            registry_thread.start()
+        
         print(f"A2A Agent {self.agent_id} started on {self.host}:{self.port}")
     
     def stop(self):
         """Stop the A2A server"""
         self.is_running = False
+        if self.registry is not None:
+            self.registry.unpublish(self.agent_id)
         if self.server_socket:
+            try:
+                # Wakes the accept() call blocked in _run_server
+                self.server_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             self.server_socket.close()
+        if self._loop is not None and self._stop_event is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # loop already closed
+        
+        with self._connections_lock:
+            connections = list(self.connections.values()) + list(self._inbound)
+            self.connections.clear()
+            self._inbound.clear()
+        for connection in connections:
+            connection.close()
+        
+        if self._broadcast_pool is not None:
+            self._broadcast_pool.shutdown(wait=False)
+            self._broadcast_pool = None
     
     def send_message(self, receiver: str, message_type: MessageType, content: Dict) -> bool:
         """Send a message to another agent"""
-        if receiver not in self.peers:
+        if not self._resolve_peer(receiver):
             print(f"Unknown peer: {receiver}")
             return False
         
-        peer_host, peer_port = self.peers[receiver]
-        message = A2AMessage(
+        message = self._build_message(receiver, message_type, content)
+        
+        try:
+            self._deliver(message)
+            if self.verbose:
+                print(f"Sent {message_type.value} to {receiver}")
+            return True
+        
+        except Exception as e:
+            print(f"Error sending message to {receiver}: {e}")
+            return False
+    
+    def request_async(self, receiver: str, message_type: MessageType, content: Dict,
+                      timeout: Optional[float] = None) -> Future:
+        """
+        Send a message and return a Future resolved with the peer's
+        RESPONSE/ERROR message (matched by correlation_id). With a timeout
+        the Future fails with TimeoutError if no answer arrives in time.
+        Cancelling the Future stops waiting for the response.
+        """
+        future = Future()
+        if not self._resolve_peer(receiver):
+            future.set_exception(ConnectionError(f"Unknown peer: {receiver}"))
+            return future
+        
+        message = self._build_message(receiver, message_type, content)
+        with self._pending_lock:
+            self._pending[message.message_id] = future
+            if timeout is not None:
+                self._schedule_deadline(time.monotonic() + timeout, message.message_id, receiver)
+        future.add_done_callback(lambda _: self._forget_request(message.message_id))
+        
+        try:
+            self._deliver(message)
+        except Exception as e:
+            _settle(future, exception=e)
+        return future
+    
+    def request(self, receiver: str, message_type: MessageType, content: Dict,
+                timeout: float = 10.0) -> Optional[A2AMessage]:
+        """Send a message and wait for the matching response"""
+        future = self.request_async(receiver, message_type, content)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"Timed out waiting for {receiver}")
+        except Exception as e:
+            print(f"Error sending message to {receiver}: {e}")
+        return None
+    
+    def broadcast(self, message_type: MessageType, content: Dict,
+                  timeout: float = BROADCAST_TIMEOUT) -> Dict[str, bool]:
+        """
+        Send a message to every peer that is not suspended, concurrently.
+        Returns peer -> delivered; peers that take longer than `timeout`
+        count as failed.
+        """
+        peers = self.live_peers()
+        if not peers:
+            return {}
+        
+        pool = self._get_broadcast_pool()
+        futures = {pool.submit(self.send_message, peer, message_type, content): peer for peer in peers}
+        done, not_done = wait(futures, timeout=timeout)
+        
+        results = {futures[future]: future.result() for future in done}
+        for future in not_done:
+            peer = futures[future]
+            results[peer] = False
+            self._mark_failed(peer)
+        return results
+    
+    def live_peers(self):
+        """Peers that are not currently suspended, including running agents found in the directory or registry"""
+        self._discover_peers()
+        now = time.time()
+        with self._health_lock:
+            return [
+                peer for peer in self.peers
+                if peer not in self.peer_health or not self.peer_health[peer].is_suspended(now)
+            ]
+    
+    def send_heartbeats(self, timeout: float = BROADCAST_TIMEOUT):
+        """
+        Run one heartbeat round: every live peer, or a random gossip_fanout
+        of them in gossip mode. Round trip times land in peer_health.
+        """
+        peers = self.live_peers()
+        content = {'agent_id': self.agent_id}
+        if self.gossip_fanout:
+            if len(peers) > self.gossip_fanout:
+                peers = random.sample(peers, self.gossip_fanout)
+            with self._health_lock:
+                content['peers'] = {
+                    peer: health.last_seen for peer, health in self.peer_health.items() if health.last_seen
+                }
+        
+        pool = self._get_broadcast_pool()
+        futures = [pool.submit(self._heartbeat_peer, peer, content, timeout) for peer in peers]
+        wait(futures, timeout=timeout + 1.0)
+    
+    def _heartbeat_peer(self, peer: str, content: Dict, timeout: float):
+        started = time.monotonic()
+        future = self.request_async(peer, MessageType.HEARTBEAT, content)
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._mark_failed(peer)
+            return
+        except Exception:
+            return  # delivery failure, already recorded
+        
+        rtt = time.monotonic() - started
+        with self._health_lock:
+            health = self.peer_health.get(peer)
+            if health is not None:
+                health.rtt = rtt if health.rtt is None else 0.8 * health.rtt + 0.2 * rtt
+    
+    def _get_broadcast_pool(self) -> ThreadPoolExecutor:
+        with self._connections_lock:
+            if self._broadcast_pool is None:
+                self._broadcast_pool = ThreadPoolExecutor(max_workers=BROADCAST_WORKERS,
+                                                          thread_name_prefix=f"a2a_broadcast_{self.agent_id}")
+            return self._broadcast_pool
+    
+    def _mark_seen(self, peer: str, seen_at: Optional[float] = None):
+        """Record that a peer is alive; lifts any suspension"""
+        with self._health_lock:
+            health = self.peer_health.get(peer)
+            if health is None:
+                return
+            seen_at = seen_at or time.time()
+            if seen_at > health.last_seen:
+                health.last_seen = seen_at
+            health.failures = 0
+            health.suspended_until = 0.0
+    
+    def _mark_failed(self, peer: str):
+        """Suspend a peer for an exponentially growing backoff"""
+        with self._health_lock:
+            health = self.peer_health.get(peer)
+            if health is None:
+                return
+            health.failures += 1
+            backoff = min(SUSPEND_BASE * 2 ** (health.failures - 1), SUSPEND_MAX)
+            health.suspended_until = time.time() + backoff * random.uniform(0.8, 1.2)
+    
+    def _resolve_peer(self, agent_id: str) -> bool:
+        """Make sure we know how to reach an agent, looking it up if needed"""
+        if agent_id in self.peers:
+            return True
+        
+        if self.local_directory is not None:
+            agent = self.local_directory.get(agent_id)
+            if agent is not None and agent is not self:
+                self.add_local_peer(agent)
+                return True
+        
+        if self.registry is not None:
+            entry = self.registry.lookup(agent_id)
+            if entry is not None:
+                self.add_peer(agent_id, entry['host'], entry['port'])
+                self._resolved.add(agent_id)
+                return True
+        return False
+    
+    def _discover_peers(self):
+        """Add running agents from the local directory and live registry entries we don't know yet"""
+        if self.local_directory is not None:
+            for agent_id, agent in list(self.local_directory.items()):
+                if agent is not self and agent.is_running and agent_id not in self.peers:
+                    self.add_local_peer(agent)
+        
+        if self.registry is not None:
+            for entry in self.registry.find():
+                agent_id = entry['agent_id']
+                if agent_id != self.agent_id and agent_id not in self.peers:
+                    self.add_peer(agent_id, entry['host'], entry['port'])
+                    self._resolved.add(agent_id)
+    
+    def _forget_resolved(self, agent_id: str):
+        """
+        Drop a registry-resolved address so the next send looks it up again.
+        Its PeerHealth stays, so live_peers() keeps skipping a suspended peer
+        that _discover_peers() finds in the registry again.
+        """
+        if agent_id in self._resolved:
+            self._resolved.discard(agent_id)
+            self.peers.pop(agent_id, None)
+            self._drop_connection(agent_id)
+    
+    def _publish(self):
+        self.registry.publish(self.agent_id, self.host, self.port, agent_type=self.agent_type,
+                              capabilities=self.capabilities, load=self.inbox.qsize())
+    
+    def _refresh_registration(self):
+        """Keep our registry entry alive while running and sweep out expired ones"""
+        interval = self.registry.ttl / 3
+        while self.is_running:
+            time.sleep(interval)
+            if not self.is_running:
+                break
+            if not self.registry.refresh(self.agent_id, load=self.inbox.qsize()):
+                self._publish()
+            self.registry.expire()
+    
+    def _build_message(self, receiver: str, message_type: MessageType, content: Dict,
+                       correlation_id: Optional[str] = None) -> A2AMessage:
+        return A2AMessage(
             message_id=self._generate_message_id(),
             sender=self.agent_id,
             receiver=receiver,
             message_type=message_type,
             content=content,
-            timestamp=time.time()
+            timestamp=time.time(),
+            correlation_id=correlation_id
         )
+    
+    def _deliver(self, message: A2AMessage):
+        """Write a message to the receiver's connection, reconnecting once if it went stale"""
+        local_peer = self.local_peers.get(message.receiver)
+        if local_peer is not None:
+            if not local_peer.is_running:
+                self._mark_failed(message.receiver)
+                raise ConnectionError(f"Agent {message.receiver} is not running")
+            local_peer._receive_local(message, self)
+            return
         
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((peer_host, peer_port))
-                s.sendall(json.dumps(message.to_dict()).encode('utf-8'))
-            
-            print(f"Sent {message_type.value} to {receiver}")
-            return True
+            for attempt in range(2):
+                connection = self._get_connection(message.receiver)
+                try:
+                    connection.send_message(message)
+                    return
+                except OSError:
+                    self._drop_connection(message.receiver, connection)
+                    if attempt:
+                        raise
+        except Exception:
+            self._mark_failed(message.receiver)
+            self._forget_resolved(message.receiver)
+            raise
+    
+    def _get_connection(self, peer_id: str) -> FramedConnection:
+        """Return the open connection to a peer, creating it on first use"""
+        connection = self.connections.get(peer_id)
+        if connection is not None and not connection.closed:
+            return connection
+        
+        # Connect under a per-peer lock so a dead peer does not hold up the others
+        with self._connections_lock:
+            connect_lock = self._connect_locks.setdefault(peer_id, threading.Lock())
+        with connect_lock:
+            connection = self.connections.get(peer_id)
+            if connection is not None and not connection.closed:
+                return connection
             
-        except Exception as e:
-            print(f"Error sending message to {receiver}: {e}")
-            return False
+            peer_host, peer_port = self.peers[peer_id]
+            connection = FramedConnection.connect(peer_host, peer_port, codecs=self.codecs)
+            with self._connections_lock:
+                self.connections[peer_id] = connection
+        
+        # Responses come back on the same stream
+        reader = threading.Thread(target=self._serve_connection, args=(connection, (peer_host, peer_port)))
+        reader.daemon = True
+        reader.start()
+        return connection
+    
+    def _drop_connection(self, peer_id: str, connection: Optional[FramedConnection] = None):
+        with self._connections_lock:
+            current = self.connections.get(peer_id)
+            if current is None or (connection is not None and current is not connection):
+                return
+            del self.connections[peer_id]
+        current.close()
     
-    def broadcast(self, message_type: MessageType, content: Dict):
-        """Broadcast message to all peers"""
-        for peer in self.peers:
-            self.send_message(peer, message_type, content)
+    def _forget_request(self, message_id: str):
+        with self._pending_lock:
+            self._pending.pop(message_id, None)
+    
+    def _schedule_deadline(self, deadline: float, message_id: str, receiver: str):
+        """Register a request timeout; called with _pending_lock held"""
+        heapq.heappush(self._deadlines, (deadline, message_id, receiver))
+        if self._deadline_thread is None:
+            self._deadline_thread = threading.Thread(target=self._expire_requests,
+                                                     name=f"a2a_{self.agent_id}_deadlines")
+            self._deadline_thread.daemon = True
+            self._deadline_thread.start()
+        self._deadline_cond.notify()
+    
+    def _expire_requests(self):
+        """Fail requests whose timeout passed; one thread serves every request"""
+        while True:
+            expired = []
+            with self._deadline_cond:
+                while not self._deadlines:
+                    self._deadline_cond.wait()
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, message_id, receiver = heapq.heappop(self._deadlines)
+                    future = self._pending.get(message_id)
+                    if future is not None:
+                        expired.append((receiver, future))
+                if not expired:
+                    self._deadline_cond.wait(self._deadlines[0][0] - now)
+                    continue
+            
+            for receiver, future in expired:
+                _settle(future, exception=TimeoutError(f"No response from {receiver}"))
     
     def _run_server(self):
         """Run the A2A server"""
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
+        if self.server_mode == 'asyncio':
+            self._run_async_server()
+            return
+        
+        try:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_socket.bind((self.host, self.port))
+            self.server_socket.listen(128)
+            self.port = self.server_socket.getsockname()[1]
+        except OSError as e:
+            print(f"A2A server error on {self.host}:{self.port}: {e}")
+            return
+        finally:
+            self._bound.set()
         
         while self.is_running:
             try:
@@ -154,46 +882,313 @@ class A2AAgent:
     
     def _handle_client(self, client_socket, address):
         """Handle incoming client connection"""
+        connection = FramedConnection(client_socket)
+        with self._connections_lock:
+            self._inbound.add(connection)
         try:
-            data = b''
-            while True:
-                chunk = client_socket.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
+            header = _recv_exact(client_socket, FRAME_HEADER.size)
+            if header is None:
+                return
+            
+            if header[:1] == b'{':
+                # Legacy sender: one bare JSON document per connection, terminated by EOF
+                self._handle_legacy_client(client_socket, header)
+                return
             
-            if data:
-                message_dict = json.loads(data.decode('utf-8'))
-                message = A2AMessage.from_dict(message_dict)
-                self._process_message(message)
-                
+            payload = connection.read_payload(FRAME_HEADER.unpack(header)[0])
+            if payload is None:
+                return
+            if payload.startswith(CODEC_OFFER):
+                connection.accept_codec(payload)
+            else:
+                self._process_message(connection.codec.decode(payload), reply=connection.send_message)
+            self._serve_connection(connection, address)
+        
         except Exception as e:
             print(f"Error handling client {address}: {e}")
         finally:
-            client_socket.close()
+            with self._connections_lock:
+                self._inbound.discard(connection)
+            connection.close()
+    
+    def _handle_legacy_client(self, client_socket, data: bytearray):
+        chunk = bytearray(4096)
+        view = memoryview(chunk)
+        while True:
+            count = client_socket.recv_into(view)
+            if not count:
+                break
+            data += view[:count]
+        
+        self._process_message(JSON_CODEC.decode(data))
+    
+    def _serve_connection(self, connection: FramedConnection, address):
+        """Process messages from a framed stream until it closes"""
+        try:
+            while not connection.closed:
+                message = connection.read_message()
+                if message is None:
+                    break
+                self._process_message(message, reply=connection.send_message)
+        except Exception as e:
+            if not connection.closed:
+                print(f"Error reading from {address}: {e}")
+        finally:
+            connection.closed = True
+    
+    def _run_async_server(self):
+        """Run the asyncio server on this thread until stop() is called"""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve_async())
+        except Exception as e:
+            print(f"A2A server error on {self.host}:{self.port}: {e}")
+        finally:
+            self._bound.set()
+            self._loop.close()
+    
+    async def _serve_async(self):
+        self._stop_event = asyncio.Event()
+        server = await asyncio.start_server(self._handle_client_async, self.host, self.port,
+                                            reuse_address=True, backlog=1024)
+        self.port = server.sockets[0].getsockname()[1]
+        self._bound.set()
+        if not self.is_running:
+            self._stop_event.set()
+        
+        async with server:
+            await self._stop_event.wait()
+        
+        for writer in list(self._async_writers):
+            writer.close()
+        clients = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if clients:
+            await asyncio.wait(clients, timeout=1.0)
+    
+    async def _handle_client_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read frames from one inbound connection inside the event loop"""
+        address = writer.get_extra_info('peername')
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._async_writers.add(writer)
+        
+        try:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            if header[:1] == b'{':
+                # Legacy sender: one bare JSON document per connection, terminated by EOF
+                data = bytearray(header)
+                while True:
+                    chunk = await reader.read(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                await self._process_message_async(JSON_CODEC.decode(data), None)
+                return
+            
+            codec = JSON_CODEC
+            reply = None
+            while True:
+                length = FRAME_HEADER.unpack(header)[0]
+                if length > MAX_FRAME_SIZE:
+                    raise ValueError(f"Frame of {length} bytes exceeds limit")
+                payload = await reader.readexactly(length)
+                if reply is None and payload.startswith(CODEC_OFFER):
+                    codec = choose_codec(payload)
+                    writer.write(_frame_bytes(CODEC_ACCEPT + codec.name.encode('ascii')))
+                else:
+                    reply = reply or self._async_replier(writer, codec)
+                    await self._process_message_async(codec.decode(payload), reply)
+                header = await reader.readexactly(FRAME_HEADER.size)
+        
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # peer closed the stream
+        except Exception as e:
+            if self.is_running:
+                print(f"Error handling client {address}: {e}")
+        finally:
+            self._async_writers.discard(writer)
+            writer.close()
     
-    def _process_message(self, message: A2AMessage):
-        """Process incoming message"""
-        print(f"Received {message.message_type.value} from {message.sender}")
+    async def _process_message_async(self, message: A2AMessage, reply):
+        """
+        Event loop version of _process_message: while the inbox is full,
+        stop reading from this connection instead of blocking the loop.
+        """
+        if not self._receive(message):
+            return
+        deadline = time.monotonic() + INBOX_PUT_TIMEOUT
+        while not self._enqueue(message, reply, block=False):
+            if time.monotonic() >= deadline:
+                self._reject(message, reply)
+                return
+            await asyncio.sleep(0.005)
+    
+    def _async_replier(self, writer: asyncio.StreamWriter, codec=JSON_CODEC):
+        """Reply function for handler threads; writes are handed to the event loop"""
+        loop = self._loop
+        
+        def write_frame(frame: bytes):
+            if not writer.is_closing():
+                writer.write(frame)
+        
+        def reply(message: A2AMessage):
+            try:
+                loop.call_soon_threadsafe(write_frame, encode_frame(message, codec))
+            except RuntimeError as e:
+                raise ConnectionError(f"Server stopped: {e}")
+        
+        return reply
+    
+    def _process_message(self, message: A2AMessage, reply=None):
+        """
+        Process incoming message on the network thread: resolve any
+        waiting request, then queue the message for a handler worker.
+        `reply` sends a message back on the stream the request arrived on;
+        without it, responses go out over our own connection to the sender.
+        """
+        if self._receive(message) and not self._enqueue(message, reply, block=True):
+            self._reject(message, reply)
+    
+    def _receive_local(self, message: A2AMessage, sender: 'A2AAgent'):
+        """Accept a message from a co-located agent; replies go straight back to it"""
+        if message.sender not in self.local_peers:
+            self.add_local_peer(sender)
+        self._process_message(message, reply=lambda response: sender._receive_local(response, self))
+    
+    def _receive(self, message: A2AMessage) -> bool:
+        """Bookkeeping for a received message; True if a handler should run"""
+        if self.verbose:
+            print(f"Received {message.message_type.value} from {message.sender}")
         
-        # Add to message queue
         self.message_queue.append(message)
+        self._mark_seen(message.sender)
+        
+        # Resolve a pending request
+        if message.correlation_id:
+            with self._pending_lock:
+                future = self._pending.get(message.correlation_id)
+            if future is not None:
+                _settle(future, message)
+        
+        return message.message_type in self.message_handlers
+    
+    def _enqueue(self, message: A2AMessage, reply, block: bool) -> bool:
+        try:
+            self.inbox.put((message, reply), block=block, timeout=INBOX_PUT_TIMEOUT if block else None)
+        except queue.Full:
+            return False
+        
+        depth = self.inbox.qsize()
+        if depth > self._inbox_high_water:
+            self._inbox_high_water = depth
+        return True
+    
+    def _reject(self, message: A2AMessage, reply):
+        """Tell the sender we are too busy to take its message"""
+        with self._stats_lock:
+            self._rejected += 1
+        if message.message_type in (MessageType.RESPONSE, MessageType.ERROR):
+            return
         
-        # Handle based on message type
+        content = {
+            'error': 'inbox full',
+            'retry_after': INBOX_RETRY_AFTER,
+            'original_message_id': message.message_id
+        }
+        self._reply(message, MessageType.ERROR, content, reply)
+    
+    def _reply(self, message: A2AMessage, message_type: MessageType, content: Dict, reply):
+        if reply is not None:
+            try:
+                reply(self._build_message(message.sender, message_type, content,
+                                          correlation_id=message.message_id))
+            except OSError as e:
+                print(f"Error replying to {message.sender}: {e}")
+        elif message.sender in self.peers:
+            self.send_message(message.sender, message_type, content)
+    
+    def _run_worker(self):
+        """Handler worker: take messages off the inbox and run their handler"""
+        while self.is_running:
+            try:
+                message, reply = self.inbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._dispatch(message, reply)
+            except Exception as e:
+                print(f"Error handling {message.message_type.value} from {message.sender}: {e}")
+                if message.message_type not in (MessageType.RESPONSE, MessageType.ERROR):
+                    self._reply(message, MessageType.ERROR,
+                                {'error': str(e), 'original_message_id': message.message_id}, reply)
+            finally:
+                self.inbox.task_done()
+    
+    def _dispatch(self, message: A2AMessage, reply):
+        """Run the handler registered for the message type and send back its response"""
         handler = self.message_handlers.get(message.message_type)
-        if handler:
+        if handler is None:
+            return
+        
+        started = time.perf_counter()
+        failed = False
+        try:
             response = handler(message)
-            if response and message.sender in self.peers:
-                self.send_message(
-                    message.sender,
-                    MessageType.RESPONSE,
-                    {'response': response, 'original_message_id': message.message_id}
-                )
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record_latency(message.message_type, time.perf_counter() - started, failed)
+        
+        if response:
+            content = {'response': response, 'original_message_id': message.message_id}
+            self._reply(message, MessageType.RESPONSE, content, reply)
+    
+    def _record_latency(self, message_type: MessageType, elapsed: float, failed: bool):
+        with self._stats_lock:
+            stats = self._handler_stats.get(message_type)
+            if stats is None:
+                stats = {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+                         'recent': deque(maxlen=LATENCY_SAMPLES)}
+                self._handler_stats[message_type] = stats
+            stats['count'] += 1
+            stats['errors'] += failed
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            stats['recent'].append(elapsed)
+    
+    def get_metrics(self) -> Dict:
+        """Inbox depth and per-message-type handler latency"""
+        with self._stats_lock:
+            handlers = {}
+            for message_type, stats in self._handler_stats.items():
+                recent = sorted(stats['recent'])
+                handlers[message_type.value] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'avg_ms': stats['total'] / stats['count'] * 1000,
+                    'p95_ms': recent[min(int(len(recent) * 0.95), len(recent) - 1)] * 1000,
+                    'max_ms': stats['max'] * 1000
+                }
+            rejected = self._rejected
+        
+        return {
+            'inbox': {
+                'depth': self.inbox.qsize(),
+                'capacity': self.inbox.maxsize,
+                'high_water': self._inbox_high_water,
+                'rejected': rejected,
+                'workers': len(self._workers)
+            },
+            'handlers': handlers
+        }
     
     def _handle_command(self, message: A2AMessage) -> Dict:
         """Handle command messages"""
         command = message.content.get('command', '')
-        print(f"Executing command from {message.sender}: {command}")
+        if self.verbose:
+            print(f"Executing command from {message.sender}: {command}")
         
         # Simulate command execution
         # In real implementation, this would execute actual commands
@@ -205,22 +1200,31 @@ class A2AAgent:
     
     def _handle_status(self, message: A2AMessage) -> Dict:
         """Handle status messages"""
-        return {
+        status = {
             'agent_id': self.agent_id,
             'status': 'active',
-            'uptime': time.time() - message.timestamp,
-            'queue_length': len(self.message_queue)
+            'uptime': time.time() - self.started_at if self.started_at else 0.0,
+            'queue_length': self.inbox.qsize()
         }
+        status.update(self.get_metrics())
+        return status
     
     def _handle_heartbeat(self, message: A2AMessage) -> Dict:
-        """Handle heartbeat messages"""
+        """Handle heartbeat messages, merging the sender's peer table in gossip mode"""
+        for peer, last_seen in message.content.get('peers', {}).items():
+            if peer != self.agent_id and last_seen:
+                with self._health_lock:
+                    health = self.peer_health.get(peer)
+                    if health is not None and last_seen > health.last_seen:
+                        health.last_seen = last_seen
         return {'status': 'alive', 'timestamp': time.time()}
     
     def _send_heartbeats(self):
-        """Send periodic heartbeats to all peers"""
+        """Send periodic heartbeats to peers"""
         while self.is_running:
-            time.sleep(30)  # Every 30 seconds
-            self.broadcast(MessageType.HEARTBEAT, {'agent_id': self.agent_id})
+            time.sleep(HEARTBEAT_INTERVAL)
+            if self.is_running:
+                self.send_heartbeats()
     
     def _generate_message_id(self) -> str:
         """Generate unique message ID"""
@@ -229,29 +1233,34 @@ class A2AAgent:
 
 class A2AManager:
     """
-    Manages multiple A2A agents for Optimus Prime
+    Manages multiple A2A agents for Optimus Prime.
+    Agents find each other on first use, or when broadcasting and sending
+    heartbeats: agents registered here through the in-process directory,
+    agents in other processes through the shared registry.
     """
     
-    def __init__(self):
+    def __init__(self, registry: Optional[AgentRegistry] = None):
         self.agents = {}
-    
-    def register_agent(self, agent_id: str, agent_type: str, host: str = 'localhost', port: int = None):
-        """Register a new agent"""
-        if port is None:
-            port = 8000 + len(self.agents)  # Auto-assign port
+        self.registry = registry
+        self._local_agents = {}  # agent_id -> A2AAgent, shared with every agent we create
         
-        agent = A2AAgent(agent_id, host, port)
-        
-        # Connect to existing agents
-        for existing_id, existing_agent in self.agents.items():
-            agent.add_peer(existing_id, existing_agent.host, existing_agent.port)
-            existing_agent.add_peer(agent_id, host, port)
+        # Routing state per target agent: calls in flight and smoothed latency
+        self._outstanding = {}
+        self._latency = {}
+        self._routing_lock = threading.Lock()
+    
+    def register_agent(self, agent_id: str, agent_type: str, host: str = 'localhost', port: int = None,
+                       capabilities: Sequence[str] = ()):
+        """Register a new agent; without a port the OS assigns one when it starts"""
+        agent = A2AAgent(agent_id, host, port or 0, registry=self.registry,
+                         agent_type=agent_type, capabilities=capabilities)
+        agent.local_directory = self._local_agents
+        self._local_agents[agent_id] = agent
         
         self.agents[agent_id] = {
             'agent': agent,
             'type': agent_type,
-            'host': host,
-            'port': port
+            'host': host
         }
         
         return agent
@@ -270,7 +1279,7 @@ class A2AManager:
         if params is None:
             params = {}
         
-        if from_agent in self.agents and to_agent in self.agents:
+        if from_agent in self.agents:
             source_agent = self.agents[from_agent]['agent']
             return source_agent.send_message(
                 to_agent,
@@ -279,6 +1288,191 @@ class A2AManager:
             )
         return False
     
+    def call(self, from_agent: str, to_agent: str, command: str, params: Dict = None,
+             timeout: float = 10.0) -> Future:
+        """
+        Send a command and return a Future for the target's response dict.
+        The Future fails with A2ACallError if the target answers with an
+        ERROR, and with TimeoutError after `timeout` seconds. Use
+        asyncio.wrap_future() (or acall) to await it from a coroutine.
+        """
+        result = Future()
+        if from_agent not in self.agents:
+            result.set_exception(KeyError(f"Unknown agent: {from_agent}"))
+            return result
+        
+        source_agent = self.agents[from_agent]['agent']
+        request = source_agent.request_async(
+            to_agent,
+            MessageType.COMMAND,
+            {'command': command, 'parameters': params or {}},
+            timeout=timeout
+        )
+        request.add_done_callback(lambda done: self._resolve_call(done, result))
+        result.add_done_callback(lambda done: done.cancelled() and request.cancel())
+        return result
+    
+    async def acall(self, from_agent: str, to_agent: str, command: str, params: Dict = None,
+                    timeout: float = 10.0):
+        """Awaitable form of call()"""
+        return await asyncio.wrap_future(self.call(from_agent, to_agent, command, params, timeout))
+    
+    def call_many(self, from_agent: str, to_agents, command: str, params: Dict = None,
+                  timeout: float = 10.0) -> Dict[str, Dict]:
+        """
+        Send the same command to several agents in parallel and gather the
+        results as agent_id -> {'status': 'success', 'response': ...} or
+        {'status': 'error', 'error': ...}.
+        """
+        futures = {to_agent: self.call(from_agent, to_agent, command, params, timeout)
+                   for to_agent in to_agents}
+        wait(futures.values(), timeout=timeout)
+        
+        results = {}
+        for to_agent, future in futures.items():
+            if not future.done():
+                future.cancel()
+                results[to_agent] = {'status': 'error', 'error': 'Timed out'}
+                continue
+            try:
+                results[to_agent] = {'status': 'success', 'response': future.result()}
+            except Exception as e:
+                results[to_agent] = {'status': 'error', 'error': str(e) or type(e).__name__}
+        return results
+    
+    def find_agents(self, agent_type: str, from_agent: Optional[str] = None) -> List[Dict]:
+        """
+        Running agents of a type, here or in the registry, with the load
+        they report (inbox depth) and our routing state for them. Peers
+        that from_agent has suspended are left out.
+        """
+        candidates = {}
+        for agent_id, info in self.agents.items():
+            if info['type'] == agent_type and info['agent'].is_running:
+                candidates[agent_id] = info['agent'].inbox.qsize()
+        if self.registry is not None:
+            for entry in self.registry.find(agent_type=agent_type):
+                candidates.setdefault(entry['agent_id'], entry['load'])
+        
+        suspended = set()
+        source_agent = self.get_agent(from_agent) if from_agent else None
+        if source_agent is not None:
+            now = time.time()
+            with source_agent._health_lock:
+                suspended = {peer for peer, health in source_agent.peer_health.items() if health.is_suspended(now)}
+        
+        with self._routing_lock:
+            return [
+                {
+                    'agent_id': agent_id,
+                    'load': load,
+                    'outstanding': self._outstanding.get(agent_id, 0),
+                    'latency': self._latency.get(agent_id)
+                }
+                for agent_id, load in candidates.items()
+                if agent_id not in suspended and agent_id != from_agent
+            ]
+    
+    def pick_agent(self, agent_type: str, from_agent: Optional[str] = None, exclude=()) -> Optional[str]:
+        """
+        Agent of a type expected to finish a new command soonest: its queue
+        (calls in flight plus reported load, plus this one) times its recent
+        latency. Agents without a latency yet are tried first; failed and
+        timed-out calls count toward latency. Ties go to the shorter queue.
+        """
+        candidates = [agent for agent in self.find_agents(agent_type, from_agent) if agent['agent_id'] not in exclude]
+        if not candidates:
+            return None
+        
+        def expected_wait(agent):
+            queue_length = agent['outstanding'] + agent['load'] + 1
+            return (queue_length * (agent['latency'] or 0.0), queue_length, random.random())
+        
+        return min(candidates, key=expected_wait)['agent_id']
+    
+    def route(self, from_agent: str, agent_type: str, command: str, params: Dict = None,
+              timeout: float = 10.0, attempts: int = 2) -> Future:
+        """
+        Send a command to whichever agent of `agent_type` is least busy and
+        return a Future for its response, like call(). If the chosen agent
+        is unreachable, times out or is too busy, the command is retried on
+        another agent of the type, up to `attempts` agents in total.
+        """
+        result = Future()
+        self._route_attempt(from_agent, agent_type, command, params, timeout, attempts, set(), result, None)
+        return result
+    
+    def get_routing_stats(self) -> Dict[str, Dict]:
+        with self._routing_lock:
+            return {
+                agent_id: {'outstanding': self._outstanding.get(agent_id, 0), 'latency': self._latency.get(agent_id)}
+                for agent_id in set(self._outstanding) | set(self._latency)
+            }
+    
+    def _route_attempt(self, from_agent, agent_type, command, params, timeout, attempts, tried, result, last_error):
+        if result.done():
+            return
+        target = self.pick_agent(agent_type, from_agent, exclude=tried) if len(tried) < attempts else None
+        if target is None:
+            _settle(result, exception=last_error or LookupError(f"No available agent of type {agent_type}"))
+            return
+        
+        tried.add(target)
+        with self._routing_lock:
+            self._outstanding[target] = self._outstanding.get(target, 0) + 1
+        started = time.monotonic()
+        attempt = self.call(from_agent, target, command, params, timeout)
+        result.add_done_callback(lambda done: done.cancelled() and attempt.cancel())
+        
+        def finished(done: Future):
+            self._record_route(from_agent, target, time.monotonic() - started, done)
+            if done.cancelled():
+                result.cancel()
+                return
+            error = done.exception()
+            if error is None:
+                _settle(result, done.result())
+            elif isinstance(error, A2ACallError) and error.content.get('error') != 'inbox full':
+                _settle(result, exception=error)  # the command itself failed; another agent would fail too
+            else:
+                self._route_attempt(from_agent, agent_type, command, params, timeout, attempts,
+                                    tried, result, error)
+        
+        attempt.add_done_callback(finished)
+    
+    def _record_route(self, from_agent: str, target: str, elapsed: float, done: Future):
+        """
+        Update a target's routing state when a call to it finishes. Failed
+        calls count their elapsed time (the full timeout for a hung agent)
+        as a latency sample, and a timeout also suspends the target for
+        the source agent, so an agent that never answers stops ranking first.
+        """
+        with self._routing_lock:
+            self._outstanding[target] = max(self._outstanding.get(target, 1) - 1, 0)
+            if not done.cancelled():
+                previous = self._latency.get(target)
+                self._latency[target] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        
+        if not done.cancelled() and isinstance(done.exception(), TimeoutError):
+            source_agent = self.get_agent(from_agent)
+            if source_agent is not None:
+                source_agent._mark_failed(target)
+    
+    @staticmethod
+    def _resolve_call(request: Future, result: Future):
+        if request.cancelled():
+            result.cancel()
+            return
+        if request.exception() is not None:
+            _settle(result, exception=request.exception())
+            return
+        
+        message = request.result()
+        if message.message_type == MessageType.ERROR:
+            _settle(result, exception=A2ACallError(message.content.get('error', 'Remote error'), message.content))
+        else:
+            _settle(result, message.content.get('response'))
+    
     def get_agent_statuses(self):
         """Get status of all agents"""
         statuses = {}
@@ -286,7 +1480,7 @@ class A2AManager:
             statuses[agent_id] = {
                 'type': info['type'],
                 'host': info['host'],
-                'port': info['port'],
+                'port': info['agent'].port,
                 'peers': list(info['agent'].peers.keys())
             }
         return statuses
\ No newline at end of file
@@ -4,6 +4,7 @@ import time
 from datetime import datetime
 from typing import Dict, List, Any
 import threading
+from sentiment import analyze_sentiment_batch
 
 class AgentEvaluator:
     """
@@ -90,6 +91,22 @@ class AgentEvaluator:
             'recommendations': self._generate_recommendations(scores)
         }
     
+    def analyze_transcript_sentiment(self, transcripts: List[str]) -> Dict:
+        """Score the sentiment of many transcripts in one batch"""
+        results = analyze_sentiment_batch(transcripts)
+        
+        breakdown = {'positive': 0, 'negative': 0, 'neutral': 0}
+        for result in results:
+            breakdown[result['type']] += 1
+        
+        return {
+            'total': len(results),
+            'breakdown': breakdown,
+            'positive_ratio': breakdown['positive'] / len(results) if results else 0,
+            'negative_ratio': breakdown['negative'] / len(results) if results else 0,
+            'results': results
+        }
+    
     def _categorize_command(self, command: str) -> str:
         """Categorize command type"""
         command = command.lower()
@@ -0,0 +1,130 @@
+# agent_registry.py
+"""
+Local service discovery for A2A agents.
+Agents publish their id, type, address, capabilities and load to a SQLite
+database shared by every process on the machine (SQLite's file locking
+serialises writers). Entries expire unless the agent refreshes them within
+the TTL, so crashed agents drop out on their own.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_TTL = 30.0  # Agents refresh their entry every ttl / 3 seconds
+
+
+class AgentRegistry:
+    """Directory of running agents shared between processes"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        if db_path is None:
+            cache_dir = Path.home() / '.optimus_cache'
+            cache_dir.mkdir(exist_ok=True)
+            db_path = str(cache_dir / 'a2a_registry.sqlite')
+
+        self.db_path = db_path
+        self.ttl = ttl
+        self._db_lock = threading.Lock()
+
+        try:
+            self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS agents ("
+                "agent_id TEXT PRIMARY KEY, agent_type TEXT, host TEXT NOT NULL, "
+                "port INTEGER NOT NULL, capabilities TEXT NOT NULL, load REAL NOT NULL, "
+                "pid INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS agents_by_type ON agents (agent_type)")
+            self._db.commit()
+        except Exception as e:
+            print(f"Agent registry error: {e}")
+            self._db = None
+
+    def publish(self, agent_id: str, host: str, port: int, agent_type: Optional[str] = None,
+                capabilities: Iterable[str] = (), load: float = 0.0):
+        """Add or refresh an agent's entry"""
+        self._execute(
+            "INSERT OR REPLACE INTO agents "
+            "(agent_id, agent_type, host, port, capabilities, load, pid, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (agent_id, agent_type, host, port, json.dumps(sorted(capabilities)), load,
+             os.getpid(), time.time())
+        )
+
+    def refresh(self, agent_id: str, load: Optional[float] = None) -> bool:
+        """Extend an entry's lifetime; False if it has expired or was never published"""
+        if load is None:
+            cursor = self._execute("UPDATE agents SET updated_at = ? WHERE agent_id = ?",
+                                   (time.time(), agent_id))
+        else:
+            cursor = self._execute("UPDATE agents SET updated_at = ?, load = ? WHERE agent_id = ?",
+                                   (time.time(), load, agent_id))
+        return bool(cursor and cursor.rowcount)
+
+    def unpublish(self, agent_id: str):
+        self._execute("DELETE FROM agents WHERE agent_id = ?", (agent_id,))
+
+    def lookup(self, agent_id: str) -> Optional[Dict]:
+        """Return a live agent's entry, or None"""
+        rows = self._query("SELECT * FROM agents WHERE agent_id = ? AND updated_at > ?",
+                           (agent_id, time.time() - self.ttl))
+        return rows[0] if rows else None
+
+    def find(self, agent_type: Optional[str] = None, capability: Optional[str] = None) -> List[Dict]:
+        """Live agents, optionally filtered by type and capability, least loaded first"""
+        sql = "SELECT * FROM agents WHERE updated_at > ?"
+        params = [time.time() - self.ttl]
+        if agent_type is not None:
+            sql += " AND agent_type = ?"
+            params.append(agent_type)
+        agents = self._query(sql + " ORDER BY load, agent_id", params)
+        if capability is not None:
+            agents = [agent for agent in agents if capability in agent['capabilities']]
+        return agents
+
+    def expire(self) -> int:
+        """Delete entries that outlived the TTL; returns how many were removed"""
+        cursor = self._execute("DELETE FROM agents WHERE updated_at <= ?", (time.time() - self.ttl,))
+        return cursor.rowcount if cursor else 0
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _execute(self, sql: str, params):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            try:
+                cursor = self._db.execute(sql, params)
+                self._db.commit()
+                return cursor
+            except sqlite3.Error as e:
+                print(f"Agent registry error: {e}")
+                return None
+
+    def _query(self, sql: str, params) -> List[Dict]:
+        if self._db is None:
+            return []
+        with self._db_lock:
+            try:
+                cursor = self._db.execute(sql, params)
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                print(f"Agent registry error: {e}")
+                return []
+
+        agents = []
+        for row in rows:
+            agent = dict(zip(columns, row))
+            agent['capabilities'] = json.loads(agent['capabilities'])
+            agents.append(agent)
+        return agents
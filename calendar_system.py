@@ -1,4 +1,5 @@
 import os
+import re
 import datetime
 import pickle
 import asyncio
@@ -13,10 +14,21 @@ from googleapiclient.errors import HttpError
 import edge_tts
 from playsound3 import playsound
 import tempfile
+import http_client
+import google_system
 
 # Google Calendar API scopes
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Maximum number of requests per Calendar API batch
+BATCH_SIZE = 50
+
+# RFC 5545 TEXT escapes: \\ \; \, and \n (or \N) for a newline
+ICS_TEXT_ESCAPE = re.compile(r'\\([\\;,nN])')
+
+# City for the weather part of the daily briefing
+BRIEFING_CITY = os.getenv("BRIEFING_CITY")
+
 class CalendarSystem:
     def __init__(self, speak_func):
         self.speak = speak_func
@@ -41,7 +53,7 @@ class CalendarSystem:
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 try:
-                    creds.refresh(Request())
+                    creds.refresh(Request(session=http_client.get_session()))
                 except Exception as e:
                     print(f"Error refreshing credentials: {e}")
                     creds = None
@@ -72,6 +84,53 @@ class CalendarSystem:
             print(f"Service build error: {e}")
             return False
     
+    def _build_event_body(self, title, start_time, end_time=None, description="", time_zone=None,
+                          location="", recurrence=None):
+        """
+        Build the Calendar API resource for a single event.
+        A datetime.date start makes an all-day event; aware datetimes keep
+        their UTC offset and naive ones are read in time_zone (default Asia/Karachi).
+        recurrence is a list of RRULE/EXDATE/RDATE lines.
+        """
+        if not isinstance(start_time, datetime.datetime):
+            # All-day event; the end date is exclusive
+            if end_time is None:
+                end_time = start_time + datetime.timedelta(days=1)
+            start = {'date': start_time.isoformat()}
+            end = {'date': end_time.isoformat()}
+        else:
+            if end_time is None:
+                end_time = start_time + datetime.timedelta(hours=1)
+            start = {'dateTime': start_time.isoformat()}
+            end = {'dateTime': end_time.isoformat()}
+            # An aware datetime carries its own offset; only naive ones need a zone
+            if time_zone is None and start_time.tzinfo is None:
+                time_zone = 'Asia/Karachi'
+            # Google needs a zone to expand a recurring event; the parser's aware times are UTC
+            if time_zone is None and recurrence:
+                time_zone = 'UTC'
+            if time_zone is not None:
+                start['timeZone'] = time_zone
+                end['timeZone'] = time_zone
+        
+        body = {
+            'summary': title,
+            'description': description,
+            'start': start,
+            'end': end,
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': 10},
+                ],
+            },
+        }
+        if location:
+            body['location'] = location
+        if recurrence:
+            body['recurrence'] = list(recurrence)
+        return body
+    
     def create_event(self, title, start_time, end_time=None, description=""):
         """Create a calendar event"""
         if not self.service:
@@ -79,28 +138,7 @@ class CalendarSystem:
                 return False
         
         try:
-            if end_time is None:
-                end_time = start_time + datetime.timedelta(hours=1)
-            
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'Asia/Karachi',
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': 'Asia/Karachi',
-                },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': 10},
-                    ],
-                },
-            }
-            
+            event = self._build_event_body(title, start_time, end_time, description)
             event = self.service.events().insert(calendarId='primary', body=event).execute()
             self.speak(f"Event created successfully: {title}")
             return True
@@ -113,6 +151,204 @@ class CalendarSystem:
             print(f"Error: {e}")
             return False
     
+    def create_events_batch(self, events, max_retries=3):
+        """
+        Create many calendar events using batched HTTP requests.
+        Each event is a dict with 'title', 'start_time' and optional
+        'end_time', 'description', 'time_zone', 'location' and 'recurrence'.
+        Events are sent in groups of
+        BATCH_SIZE and only failed items are retried.
+        Returns a list of per-event results in input order.
+        """
+        results = [
+            {'title': event.get('title'), 'success': False, 'event_id': None, 'error': None}
+            for event in events
+        ]
+        
+        if not events:
+            return results
+        
+        if not self.service:
+            if not self.authenticate_google():
+                for result in results:
+                    result['error'] = 'Not authenticated'
+                return results
+        
+        pending = []
+        for index, event in enumerate(events):
+            try:
+                body = self._build_event_body(
+                    event['title'],
+                    event['start_time'],
+                    event.get('end_time'),
+                    event.get('description', ""),
+                    event.get('time_zone'),
+                    event.get('location', ""),
+                    event.get('recurrence')
+                )
+                pending.append((index, body))
+            except Exception as e:
+                results[index]['error'] = f"Invalid event: {e}"
+        
+        attempt = 0
+        while pending and attempt <= max_retries:
+            if attempt > 0:
+                time.sleep(min(2 ** attempt, 30))
+            
+            retry = []
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                retry.extend(self._execute_insert_batch(chunk, results))
+            
+            pending = retry
+            attempt += 1
+        
+        created = sum(1 for result in results if result['success'])
+        failed = len(results) - created
+        if failed:
+            self.speak(f"Created {created} events. {failed} events could not be created.")
+        else:
+            self.speak(f"All {created} events created successfully.")
+        
+        return results
+    
+    def _execute_insert_batch(self, chunk, results):
+        """Send one batch of inserts and return the items worth retrying"""
+        retry = []
+        bodies = dict((str(index), body) for index, body in chunk)
+        
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index]['success'] = True
+                results[index]['event_id'] = response.get('id')
+                results[index]['error'] = None
+                return
+            
+            results[index]['error'] = str(exception)
+            if self._is_retryable(exception):
+                retry.append((index, bodies[request_id]))
+        
+        try:
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index, body in chunk:
+                batch.add(
+                    self.service.events().insert(calendarId='primary', body=body),
+                    request_id=str(index)
+                )
+            batch.execute()
+        except Exception as e:
+            # The whole batch failed to send; retry every item that has no result yet
+            print(f"Error executing event batch: {e}")
+            for index, body in chunk:
+                if not results[index]['success']:
+                    results[index]['error'] = str(e)
+                    if (index, body) not in retry:
+                        retry.append((index, body))
+        
+        return retry
+    
+    def _is_retryable(self, exception):
+        """Check whether a failed batch item is worth retrying"""
+        if isinstance(exception, HttpError):
+            status = getattr(exception.resp, 'status', None)
+            try:
+                status = int(status)
+            except (TypeError, ValueError):
+                return False
+            return status in (403, 429) or status >= 500
+        return True
+    
+    def load_ics_events(self, ics_path):
+        """
+        Read VEVENT entries from an .ics file into event dicts
+        suitable for create_events_batch. Properties of nested components
+        (VALARM) are skipped, and RRULE/EXDATE/RDATE lines are passed
+        through as the event's recurrence rather than expanded.
+        """
+        events = []
+        try:
+            with open(ics_path, 'r', encoding='utf-8') as f:
+                raw_lines = f.read().splitlines()
+        except Exception as e:
+            print(f"Error reading ics file: {e}")
+            return events
+        
+        # Unfold continuation lines (RFC 5545 section 3.1)
+        lines = []
+        for line in raw_lines:
+            if line[:1] in (' ', '\t') and lines:
+                lines[-1] += line[1:]
+            else:
+                lines.append(line)
+        
+        current = None
+        components = []  # open BEGIN blocks, innermost last
+        for line in lines:
+            upper = line.strip().upper()
+            if upper.startswith('BEGIN:'):
+                components.append(upper[6:])
+                if upper == 'BEGIN:VEVENT':
+                    current = {}
+            elif upper.startswith('END:'):
+                if components:
+                    components.pop()
+                if upper == 'END:VEVENT':
+                    if current is not None and 'title' in current and 'start_time' in current:
+                        events.append(current)
+                    current = None
+            elif current is not None and components[-1:] == ['VEVENT'] and ':' in line:
+                name, value = line.split(':', 1)
+                name, *param_list = name.split(';')
+                name = name.upper()
+                params = dict(
+                    (key.upper(), param_value.strip('"'))
+                    for key, _, param_value in (param.partition('=') for param in param_list)
+                )
+                if name == 'SUMMARY':
+                    current['title'] = self._unescape_ics_text(value).strip()
+                elif name == 'DESCRIPTION':
+                    current['description'] = self._unescape_ics_text(value).strip()
+                elif name == 'LOCATION':
+                    current['location'] = self._unescape_ics_text(value).strip()
+                elif name in ('RRULE', 'EXDATE', 'RDATE'):
+                    current.setdefault('recurrence', []).append(line.strip())
+                elif name in ('DTSTART', 'DTEND'):
+                    parsed = self._parse_ics_datetime(value.strip(), params.get('VALUE'))
+                    if parsed:
+                        current['start_time' if name == 'DTSTART' else 'end_time'] = parsed
+                        # Local times are interpreted by Google in the event's TZID
+                        if 'TZID' in params and name == 'DTSTART':
+                            current['time_zone'] = params['TZID']
+        
+        return events
+    
+    def _unescape_ics_text(self, value):
+        """Undo RFC 5545 TEXT escaping"""
+        return ICS_TEXT_ESCAPE.sub(lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+    
+    def _parse_ics_datetime(self, value, value_type=None):
+        """
+        Parse an iCalendar DATE or DATE-TIME value. DATE values become a
+        datetime.date, UTC times ("...Z") an aware datetime, and floating
+        or TZID times a naive datetime.
+        """
+        if (value_type or '').upper() == 'DATE' or (len(value) == 8 and value.isdigit()):
+            try:
+                return datetime.datetime.strptime(value, "%Y%m%d").date()
+            except ValueError:
+                return None
+        
+        utc = value.endswith('Z')
+        value = value[:-1] if utc else value
+        for fmt in ("%Y%m%dT%H%M%S", "%Y%m%dT%H%M"):
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            return parsed.replace(tzinfo=datetime.timezone.utc) if utc else parsed
+        return None
+    
     def view_events(self, days_ahead=7):
         """View upcoming events"""
         if not self.service:
@@ -263,8 +499,12 @@ class CalendarSystem:
         except Exception as e:
             print(f"Error in speak_reminder: {e}")
     
-    def daily_briefing(self):
-        """Provide daily schedule briefing"""
+    def daily_briefing(self, city=None):
+        """
+        Provide the daily briefing: today's schedule, weather and headlines,
+        fetched concurrently so the slowest source sets the wait (bounded by
+        google_system.DEFAULT_SOURCE_DEADLINE)
+        """
         now = datetime.datetime.now()
         greeting_hour = now.hour
         
@@ -278,25 +518,36 @@ class CalendarSystem:
         date_str = now.strftime('%A, %B %d, %Y')
         self.speak(f"{greeting}. Today is {date_str}. Let me check your schedule.")
         
-        if not self.service:
-            if not self.authenticate_google():
-                self.speak("Unable to retrieve your schedule.")
-                return
+        extra_sources = {}
+        if self.service or self.authenticate_google():
+            extra_sources['calendar'] = self.list_todays_events
+        else:
+            self.speak("Unable to retrieve your schedule.")
+        
+        briefing = google_system.get_briefing(city or BRIEFING_CITY, extra_sources=extra_sources)
+        results = briefing['results']
+        for name in briefing['timed_out']:
+            print(f"Daily briefing: {name} did not answer in time")
+        for name, error in briefing['errors'].items():
+            print(f"Daily briefing: {name} failed: {error}")
+        
+        if 'calendar' in extra_sources:
+            self._speak_schedule(results.get('calendar'))
+        
+        if 'weather' in results:
+            self.speak(results['weather'])
+        if results.get('news'):
+            self.speak("Here are the top headlines.")
+            for headline in results['news'][:3]:
+                self.speak(headline)
+    
+    def _speak_schedule(self, events):
+        """Speak today's events; None means the calendar could not be read"""
+        if events is None:
+            self.speak("Unable to retrieve your schedule at this time.")
+            return
         
         try:
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat() + 'Z'
-            today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999).isoformat() + 'Z'
-            
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=today_start,
-                timeMax=today_end,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            
             if not events:
                 self.speak("You have no events scheduled for today. You have a free day!")
             else:
@@ -320,6 +571,26 @@ class CalendarSystem:
             self.speak("Unable to retrieve your schedule at this time.")
             print(f"Error in daily briefing: {e}")
     
+    def list_todays_events(self):
+        """Return today's events without speaking; raises on API errors"""
+        if not self.service:
+            if not self.authenticate_google():
+                return []
+        
+        now = datetime.datetime.now()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat() + 'Z'
+        today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999).isoformat() + 'Z'
+        
+        events_result = self.service.events().list(
+            calendarId='primary',
+            timeMin=today_start,
+            timeMax=today_end,
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute()
+        
+        return events_result.get('items', [])
+    
     def save_reminders(self):
         """Save reminders to file"""
         try:
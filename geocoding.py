@@ -0,0 +1,180 @@
+# geocoding.py
+"""
+Place-name geocoding through Nominatim with a persistent SQLite cache,
+concurrent resolution of several places and request pacing that respects
+the public Nominatim rate limit.
+"""
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+import http_client
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+DEFAULT_TTL = 90 * 24 * 60 * 60  # Place coordinates rarely change
+MIN_REQUEST_INTERVAL = 1.0  # Nominatim usage policy: at most one request per second
+
+
+class GeocodingService:
+    """Resolve place names to (latitude, longitude) pairs"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl: float = DEFAULT_TTL,
+                 min_interval: float = MIN_REQUEST_INTERVAL):
+        if db_path is None:
+            cache_dir = Path.home() / '.optimus_cache'
+            cache_dir.mkdir(exist_ok=True)
+            db_path = str(cache_dir / 'geocode.sqlite')
+
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self._next_request_at = 0.0
+        self._pace_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="geocoding")
+
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS places ("
+                "name TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL, "
+                "stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"Geocoding cache error: {e}")
+            self._db = None
+
+    @staticmethod
+    def normalize(place: str) -> str:
+        """Normalize a place name into a cache key"""
+        place = re.sub(r'[^\w\s,-]', ' ', place.lower())
+        return ' '.join(place.split()).strip(' ,-')
+
+    def geocode(self, place: str) -> Optional[Tuple[float, float]]:
+        """Return coordinates for a place, or None if it can't be found"""
+        key = self.normalize(place)
+        if not key:
+            return None
+
+        cached = self._load(key)
+        if cached is not None:
+            return cached
+
+        coords = self._lookup(key)
+        if coords is not None:
+            self._store(key, coords)
+        return coords
+
+    def geocode_many(self, places: List[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Resolve several places at once. Cached places never touch the
+        network; the rest are looked up concurrently, subject to pacing.
+        """
+        results = {}
+        pending = {}
+        in_flight = {}
+        for place in places:
+            key = self.normalize(place)
+            cached = self._load(key) if key else None
+            if cached is not None or not key:
+                results[place] = cached
+            else:
+                if key not in in_flight:
+                    in_flight[key] = self._executor.submit(self.geocode, place)
+                pending[place] = in_flight[key]
+
+        for place, future in pending.items():
+            try:
+                results[place] = future.result()
+            except Exception as e:
+                print(f"Geocoding error for {place}: {e}")
+                results[place] = None
+
+        return results
+
+    def _pace(self):
+        """Block until the next request slot is available"""
+        with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _backoff(self, seconds: float):
+        """Push the next request slot back after the server asked us to slow down"""
+        with self._pace_lock:
+            self._next_request_at = max(self._next_request_at, time.monotonic() + seconds)
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, float]]:
+        """
+        Query Nominatim for a normalized place name. Retries on 5xx and
+        connection errors are done here rather than by http_client, so every
+        attempt waits for its own request slot.
+        """
+        retries = http_client.MAX_RETRIES
+        for attempt in range(retries + 1):
+            self._pace()
+            try:
+                response = http_client.get(
+                    NOMINATIM_URL,
+                    params={'format': 'json', 'q': key, 'limit': 1},
+                    retries=0
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                continue
+            if response.status_code < 500 or attempt >= retries:
+                break
+            response.close()
+
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get('Retry-After', 60))
+            except ValueError:
+                retry_after = 60
+            self._backoff(retry_after)
+            print(f"Geocoding rate limited, pausing requests for {retry_after:.0f} seconds")
+            return None
+
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return None
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+    def _load(self, key: str) -> Optional[Tuple[float, float]]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT lat, lon, stored_at FROM places WHERE name = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Geocoding cache read error: {e}")
+            return None
+
+        if row and time.time() - row[2] < self.ttl:
+            return row[0], row[1]
+        return None
+
+    def _store(self, key: str, coords: Tuple[float, float]):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO places (name, lat, lon, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, coords[0], coords[1], time.time())
+                )
+                self._db.commit()
+        except Exception as e:
+            print(f"Geocoding cache write error: {e}")
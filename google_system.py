@@ -1,6 +1,9 @@
 import os
-import requests
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import http_client
+from response_cache import ResponseCache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +12,37 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB")  # Optional SQLite file for the on-disk cache
+
+# Cache lifetimes in seconds for each endpoint
+CACHE_TTLS = {
+    "weather": 10 * 60,
+    "news": 5 * 60,
+    "search": 60 * 60
+}
+
+_response_cache = ResponseCache(CACHE_TTLS, maxsize=256, db_path=RESPONSE_CACHE_DB)
+
+# Worker threads for concurrent multi-source queries; they share http_client's session
+DEFAULT_SOURCE_DEADLINE = 5.0
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="google_system")
+
+def _get_json(endpoint, cache_key, url, params, timeout=http_client.DEFAULT_TIMEOUT, retries=None):
+    """
+    GET a JSON document through the response cache.
+    Only successful responses are cached.
+    """
+    def fetch():
+        response = http_client.get(url, params=params, timeout=timeout, retries=retries)
+        response.raise_for_status()
+        return response.json()
+
+    return _response_cache.get_or_fetch(endpoint, cache_key, fetch)
+
+def clear_cache():
+    """Drop all cached weather, news and search responses"""
+    _response_cache.clear()
+
 
 def perform_google_search(query):
     """
@@ -27,9 +61,7 @@ def perform_google_search(query):
     }
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = _get_json("search", " ".join(query.lower().split()), url, params)
 
         if "items" in data:
             first_result = data["items"][0]
@@ -43,7 +75,7 @@ def perform_google_search(query):
         print(f"Google Search Error: {e}")
         return "Sorry, I encountered an error while searching Google."
 
-def get_top_news():
+def get_top_news(timeout=http_client.DEFAULT_TIMEOUT, retries=None):
     """
     Fetches top headlines using NewsAPI.
     Returns a list of strings (headlines).
@@ -59,9 +91,7 @@ def get_top_news():
     }
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = _get_json("news", params["country"], url, params, timeout, retries)
 
         if data.get("status") == "ok":
             articles = data.get("articles", [])
@@ -81,7 +111,7 @@ def get_top_news():
         print(f"News API Error: {e}")
         return ["Sorry, I encountered an error while fetching the news."]
 
-def get_weather(city):
+def get_weather(city, timeout=http_client.DEFAULT_TIMEOUT, retries=None):
     """
     Fetches current weather for a city using OpenWeatherMap.
     Returns a summary string.
@@ -97,9 +127,7 @@ def get_weather(city):
     }
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = _get_json("weather", " ".join(city.lower().split()), url, params, timeout, retries)
 
         weather_desc = data["weather"][0]["description"]
         temp = data["main"]["temp"]
@@ -111,3 +139,65 @@ def get_weather(city):
     except Exception as e:
         print(f"Weather API Error: {e}")
         return f"Sorry, I couldn't get the weather for {city}. Please check the city name."
+
+def fetch_concurrently(sources, deadline=DEFAULT_SOURCE_DEADLINE, deadlines=None):
+    """
+    Run several zero-argument source callables at the same time.
+    Each source gets `deadline` seconds (or its entry in `deadlines`),
+    measured from the moment all of them were started.
+    Returns a dict with the 'results' that arrived in time, the sources
+    that 'timed_out' and any 'errors' raised by a source.
+    """
+    deadlines = deadlines or {}
+    started = time.monotonic()
+    futures = {name: _executor.submit(source) for name, source in sources.items()}
+
+    results = {}
+    timed_out = []
+    errors = {}
+
+    ordered = sorted(futures, key=lambda name: deadlines.get(name, deadline))
+    for name in ordered:
+        remaining = started + deadlines.get(name, deadline) - time.monotonic()
+        try:
+            results[name] = futures[name].result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            futures[name].cancel()
+            timed_out.append(name)
+        except Exception as e:
+            errors[name] = str(e)
+
+    return {
+        'results': results,
+        'timed_out': timed_out,
+        'errors': errors,
+        'elapsed': time.monotonic() - started
+    }
+
+def deadline_budget(deadline):
+    """
+    (connect, read) timeout and retry count for a request that must finish
+    within `deadline` seconds. Retries are dropped: with backoff they would
+    outlive the deadline and keep a worker busy after its result is discarded.
+    """
+    connect = min(http_client.DEFAULT_TIMEOUT[0], deadline / 2)
+    return (connect, max(deadline - connect, 0.1)), 0
+
+def get_briefing(city=None, extra_sources=None, deadline=DEFAULT_SOURCE_DEADLINE):
+    """
+    Fetch weather (when a city is given) and top news concurrently, plus
+    any extra sources (e.g. {'calendar': calendar_system.list_todays_events}).
+    Sources without an API key are skipped. Their requests are bounded by
+    the deadline, and slow sources are left out of 'results' and listed
+    in 'timed_out'.
+    """
+    timeout, retries = deadline_budget(deadline)
+    sources = {}
+    if city and WEATHER_API_KEY:
+        sources['weather'] = lambda: get_weather(city, timeout=timeout, retries=retries)
+    if NEWS_API_KEY:
+        sources['news'] = lambda: get_top_news(timeout=timeout, retries=retries)
+    if extra_sources:
+        sources.update(extra_sources)
+
+    return fetch_concurrently(sources, deadline=deadline)
@@ -0,0 +1,136 @@
+# http_client.py
+"""
+Shared HTTP client for Optimus Prime.
+One keep-alive requests.Session with a pooled adapter, default timeouts,
+retry with jittered backoff on 5xx/connection errors and per-host
+concurrency caps.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+MAX_REQUESTS_PER_HOST = 4
+USER_AGENT = "OptimusPrime/1.0"
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+
+def new_session(trust_env: bool = True) -> requests.Session:
+    """
+    Create a keep-alive session with the shared pool settings.
+    trust_env=False skips the per-request proxy/netrc environment lookup,
+    which is pure overhead for servers on localhost.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=0
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    session.trust_env = trust_env
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = new_session()
+    return _session
+
+
+def close_session():
+    """Close the shared session and release pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def set_host_limit(host: str, limit: int):
+    """Set the maximum number of in-flight requests for a host"""
+    with _host_lock:
+        _host_limits[host] = limit
+        _host_semaphores[host] = threading.BoundedSemaphore(limit)
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Get the concurrency cap for the host of a URL"""
+    host = urlparse(url).netloc
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            limit = _host_limits.get(host, MAX_REQUESTS_PER_HOST)
+            semaphore = threading.BoundedSemaphore(limit)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method: str, url: str, retries: int = None, timeout=DEFAULT_TIMEOUT,
+            session: requests.Session = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session (or `session`).
+    Idempotent methods are retried on 5xx responses and connection errors;
+    other methods are only retried when `retries` is given explicitly.
+    The last response is returned as-is, the last exception is re-raised.
+    """
+    method = method.upper()
+    if retries is None:
+        retries = MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+
+    semaphore = _host_semaphore(url)
+    session = session or get_session()
+
+    for attempt in range(retries + 1):
+        with semaphore:
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                response = None
+
+        if response is not None and (response.status_code < 500 or attempt >= retries):
+            return response
+
+        if response is not None:
+            response.close()
+        time.sleep(_backoff_delay(attempt))
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session"""
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared session"""
+    return request('POST', url, **kwargs)
@@ -0,0 +1,182 @@
+# http_client_check.py
+"""
+Runnable check for http_client against a local stub server: retries on
+5xx for idempotent methods only, (connect, read) timeouts and the
+per-host concurrency cap. Needs no network access.
+
+Usage: python http_client_check.py
+Exits non-zero if any check fails.
+"""
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import http_client
+
+
+class StubState:
+    """Counters the stub handler updates"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self):
+        with self.lock:
+            self.hits = {}
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+
+def serve_stub(state: StubState) -> ThreadingHTTPServer:
+    """
+    Start the stub on an OS-assigned localhost port:
+      /flaky?fail=N  503 for the first N hits of the path, then 200
+      /slow?delay=S  sleep S seconds, then 200
+      /busy?delay=S  like /slow, recording how many requests overlap
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self._handle()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            self._handle()
+
+        def _handle(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            delay = float(query.get('delay', ['0'])[0])
+
+            if url.path == '/flaky':
+                with state.lock:
+                    hits = state.hits[url.path] = state.hits.get(url.path, 0) + 1
+                status = 503 if hits <= int(query.get('fail', ['0'])[0]) else 200
+                self._send(status, {'hits': hits})
+            elif url.path == '/slow':
+                time.sleep(delay)
+                self._send(200, {'slept': delay})
+            elif url.path == '/busy':
+                with state.lock:
+                    state.in_flight += 1
+                    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                time.sleep(delay)
+                with state.lock:
+                    state.in_flight -= 1
+                self._send(200, {})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def _send(self, status, result):
+            body = json.dumps(result).encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass  # The client already gave up (the timeout check)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('localhost', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check_retries(base, state):
+    state.reset()
+    response = http_client.get(f"{base}/flaky?fail=2")
+    assert response.status_code == 200, f"GET should succeed after retries, got {response.status_code}"
+    assert state.hits['/flaky'] == 3, f"expected 3 attempts, server saw {state.hits['/flaky']}"
+
+    state.reset()
+    response = http_client.post(f"{base}/flaky?fail=2")
+    assert response.status_code == 503, "POST must not be retried by default"
+    assert state.hits['/flaky'] == 1, f"POST was sent {state.hits['/flaky']} times"
+
+    state.reset()
+    response = http_client.get(f"{base}/flaky?fail=10", retries=2)
+    assert response.status_code == 503, "the last 5xx response is returned once retries run out"
+    assert state.hits['/flaky'] == 3, f"expected 3 attempts, server saw {state.hits['/flaky']}"
+
+
+def check_timeouts(base, state):
+    started = time.perf_counter()
+    try:
+        http_client.get(f"{base}/slow?delay=1", timeout=(1, 0.2), retries=0)
+    except requests.Timeout:
+        pass
+    else:
+        raise AssertionError("read timeout was not raised")
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.6, f"read timeout took {elapsed:.2f}s"
+
+    # Connection refused on a closed port raises after the retries, without hanging
+    closed = ThreadingHTTPServer(('localhost', 0), BaseHTTPRequestHandler)
+    port = closed.server_address[1]
+    closed.server_close()
+    try:
+        http_client.get(f"http://localhost:{port}/", timeout=(0.5, 0.5), retries=1)
+    except requests.ConnectionError:
+        pass
+    else:
+        raise AssertionError("connection error was not raised")
+
+
+def check_host_cap(base, state):
+    host = urlparse(base).netloc
+
+    def busy(_):
+        return http_client.get(f"{base}/busy?delay=0.2").status_code
+
+    for limit in (http_client.MAX_REQUESTS_PER_HOST, 8):
+        if limit != http_client.MAX_REQUESTS_PER_HOST:
+            http_client.set_host_limit(host, limit)
+        state.reset()
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            statuses = list(pool.map(busy, range(12)))
+        assert statuses == [200] * 12, f"unexpected statuses {statuses}"
+        assert state.max_in_flight == limit, \
+            f"cap {limit}: server saw {state.max_in_flight} concurrent requests"
+
+
+def main():
+    # Keep backoff short so the retry checks finish quickly
+    http_client.BACKOFF_BASE = 0.01
+    state = StubState()
+    server = serve_stub(state)
+    base = f"http://localhost:{server.server_address[1]}"
+
+    failures = 0
+    for check in (check_retries, check_timeouts, check_host_cap):
+        try:
+            check(base, state)
+            print(f"PASS {check.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL {check.__name__}: {e}")
+
+    server.shutdown()
+    http_client.close_session()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# intent_cache.py
+"""
+Cache for LLM intent results.
+Exact matches on the normalized query are served from an LRU map.
+Optionally (similarity_threshold), near matches are found by cosine
+similarity over hashed character-trigram embeddings computed locally; a
+paraphrase is only reused when it carries the same numbers, since the
+cached result holds the other utterance's target and parameters.
+Concurrent requests for the same query share one model call, and callers
+can cap how long they wait for it.
+"""
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from response_cache import LRUCache
+
+EMBEDDING_DIM = 512
+
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r"[^\w\s']", ' ', query.lower()).split())
+
+
+def embed(text: str) -> np.ndarray:
+    """Unit-length hashed character-trigram vector for a normalized query"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    padded = f"  {text} "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode('utf-8')) % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def numbers_in(text: str):
+    """The numbers a query mentions, in order"""
+    return _NUMBER_RE.findall(text)
+
+
+class IntentCache:
+    """
+    Exact (and opt-in similarity) cache with request coalescing for intent
+    lookups. Similarity is off by default: a paraphrase's cached answer
+    includes that utterance's target and parameters.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 24 * 60 * 60,
+                 similarity_threshold: Optional[float] = None, max_workers: int = 2):
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.entries = LRUCache(maxsize)
+        self.similar_hits = 0
+
+        # Similarity index: a ring of embeddings aligned with the keys they came from
+        self._vectors = np.zeros((maxsize, EMBEDDING_DIM), dtype=np.float32)
+        self._vector_keys = [None] * maxsize
+        self._next_row = 0
+        self._rows = {}
+        self._index_lock = threading.Lock()
+
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="intent_cache")
+
+    def get(self, query: str):
+        """Return a cached result for the query or a close paraphrase of it"""
+        key = normalize_query(query)
+        value = self._get_fresh(key)
+        if value is not None or not self.similarity_threshold:
+            return value
+
+        similar_key = self._find_similar(key)
+        if similar_key is not None:
+            value = self._get_fresh(similar_key)
+            if value is not None:
+                self.similar_hits += 1
+        return value
+
+    def put(self, query: str, value: Any):
+        """Cache a result for the query"""
+        key = normalize_query(query)
+        self.entries.set(key, (value, time.time()))
+        if self.similarity_threshold:
+            self._index(key)
+
+    def get_or_compute(self, query: str, compute: Callable[[], Any],
+                       timeout: Optional[float] = None):
+        """
+        Return the cached result or run compute() once for all concurrent
+        callers asking the same query. Waits at most `timeout` seconds and
+        returns None past that; the result is still cached when it arrives.
+        None results are never cached.
+        """
+        future = self.submit(query, compute)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        except Exception as e:
+            print(f"[Intent Cache Error]: {e}")
+            return None
+
+    def submit(self, query: str, compute: Callable[[], Any]) -> Future:
+        """
+        Start (or join) the lookup for a query without waiting for it.
+        Returns a Future that is already resolved on a cache hit.
+        """
+        cached = self.get(query)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        key = normalize_query(query)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+                self._executor.submit(self._compute, query, key, compute, future)
+        return future
+
+    def clear(self):
+        """Drop every cached result"""
+        self.entries.clear()
+        self.similar_hits = 0
+        with self._index_lock:
+            self._vectors[:] = 0
+            self._vector_keys = [None] * len(self._vector_keys)
+            self._rows = {}
+            self._next_row = 0
+
+    def get_stats(self):
+        stats = self.entries.get_stats()
+        stats['similar_hits'] = self.similar_hits
+        with self._in_flight_lock:
+            stats['in_flight'] = len(self._in_flight)
+        return stats
+
+    def _compute(self, query, key, compute, future):
+        try:
+            value = compute()
+            if value is not None:
+                self.put(query, value)
+            future.set_result(value)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    def _get_fresh(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            self.entries.pop(key)
+            return None
+        return value
+
+    def _index(self, key):
+        vector = embed(key)
+        with self._index_lock:
+            if key in self._rows:
+                return
+            row = self._next_row
+            old_key = self._vector_keys[row]
+            if old_key is not None:
+                self._rows.pop(old_key, None)
+            self._vectors[row] = vector
+            self._vector_keys[row] = key
+            self._rows[key] = row
+            self._next_row = (row + 1) % len(self._vector_keys)
+
+    def _find_similar(self, key):
+        """Closest cached key above the threshold that mentions the same numbers"""
+        vector = embed(key)
+        numbers = numbers_in(key)
+        with self._index_lock:
+            if not self._rows:
+                return None
+            scores = self._vectors @ vector
+            for row in np.argsort(scores)[::-1]:
+                if scores[row] < self.similarity_threshold:
+                    break
+                candidate = self._vector_keys[row]
+                # "brightness to 80" must not answer "brightness to 30"
+                if candidate is not None and numbers_in(candidate) == numbers:
+                    return candidate
+        return None
@@ -0,0 +1,121 @@
+# intent_cache_check.py
+"""
+Runnable check for the Gemini intent cache using a fake model in place of
+NLPProcessor.gemini_model: repeated and reworded queries reuse one call,
+concurrent identical queries share one call, slow answers fall back to
+None within the latency budget, and utterances that differ only in a
+number never share a cached answer. Needs no API key or network access.
+
+Usage: python intent_cache_check.py
+Exits non-zero if any check fails.
+"""
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from intent_cache import IntentCache
+from nlp_processor import NLPProcessor
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Answers in the ACTION | TARGET | PARAMETERS | CONFIDENCE format and counts calls"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        command = re.search(r'Command: "(.*)"', prompt).group(1)
+        words = command.split()
+        numbers = re.findall(r'\d+', command)
+        parameters = f"{numbers[0]} percent" if numbers else 'none'
+        return FakeResponse(f"{words[0].lower()} | {' '.join(words[1:2]) or 'none'} | {parameters} | 0.95")
+
+
+def make_processor(model: FakeGeminiModel, **cache_options) -> NLPProcessor:
+    processor = NLPProcessor()
+    processor.gemini_model = model
+    processor.ai_enabled = True
+    processor.intent_cache = IntentCache(**cache_options)
+    return processor
+
+
+def check_repeats_reuse_one_call():
+    model = FakeGeminiModel()
+    processor = make_processor(model)
+    first = processor.ai_understand("Open Chrome")
+    assert first and first['action'] == 'open', f"unexpected answer {first}"
+    assert processor.ai_understand("open   chrome!") == first
+    assert model.calls == 1, f"expected 1 model call, got {model.calls}"
+
+
+def check_concurrent_queries_coalesce():
+    model = FakeGeminiModel(delay=0.2)
+    processor = make_processor(model)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(lambda _: processor.ai_understand("play some jazz"), range(8)))
+    assert all(answer == answers[0] for answer in answers), "callers got different answers"
+    assert model.calls == 1, f"expected 1 model call, got {model.calls}"
+
+
+def check_latency_budget():
+    model = FakeGeminiModel(delay=0.5)
+    processor = make_processor(model)
+    started = time.perf_counter()
+    assert processor.ai_understand("lock the screen", timeout=0.1) is None
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.3, f"waited {elapsed:.2f}s past a 0.1s budget"
+    # The answer still lands in the cache for the next ask
+    time.sleep(0.6)
+    assert processor.ai_understand("lock the screen", timeout=0.1) is not None
+    assert model.calls == 1, f"expected 1 model call, got {model.calls}"
+
+
+def check_numbers_are_not_shared():
+    for options in ({}, {'similarity_threshold': 0.9}):
+        model = FakeGeminiModel()
+        processor = make_processor(model, **options)
+        eighty = processor.ai_understand("increase brightness to 80 percent")
+        thirty = processor.ai_understand("increase brightness to 30 percent")
+        assert eighty['parameters'] == '80 percent', f"unexpected answer {eighty}"
+        assert thirty['parameters'] == '30 percent', \
+            f"{options or 'default'}: 30 percent query got {thirty['parameters']}"
+        assert model.calls == 2, f"expected 2 model calls, got {model.calls}"
+
+
+def check_similar_paraphrase_reused_when_enabled():
+    model = FakeGeminiModel()
+    processor = make_processor(model, similarity_threshold=0.8)
+    processor.ai_understand("please open the chrome browser")
+    processor.ai_understand("please open the chrome browser now")
+    assert model.calls == 1, f"expected the paraphrase to reuse the cached answer, got {model.calls} calls"
+    assert processor.intent_cache.get_stats()['similar_hits'] == 1
+
+
+def main():
+    failures = 0
+    for check in (check_repeats_reuse_one_call, check_concurrent_queries_coalesce,
+                  check_latency_budget, check_numbers_are_not_shared,
+                  check_similar_paraphrase_reused_when_enabled):
+        try:
+            check()
+            print(f"PASS {check.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL {check.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
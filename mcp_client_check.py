@@ -0,0 +1,108 @@
+# mcp_client_check.py
+"""
+Runnable check for MCPClient against MCPServerEmulator.serve_http on a
+local port: read timeouts, retries for read-only tools only, and a new
+session when the server forgets ours. Needs no network access.
+
+Usage: python mcp_client_check.py
+Exits non-zero if any check fails.
+"""
+import sys
+import threading
+import time
+
+import http_client
+from mcp_integration import MCPClient, MCPServerEmulator, Tool
+
+
+class StubEmulator(MCPServerEmulator):
+    """
+    Emulator with test tools that count their executions:
+      slow_task    sleeps `delay` seconds (not retry-safe)
+      flaky_write  drops the connection on its first call (not retry-safe)
+      flaky_read   drops the connection on its first call (read-only)
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.executions = {}
+        self.lock = threading.Lock()
+        schema = {'type': 'object', 'properties': {'delay': {'type': 'number'}}}
+        for name, annotations in (('slow_task', {}), ('flaky_write', {}),
+                                  ('flaky_read', {'readOnlyHint': True})):
+            self.register_tool(Tool(name=name, description=f'Check tool {name}', input_schema=schema,
+                                    output_schema={'type': 'object'}, annotations=annotations))
+
+    def _execute_tool(self, tool_name, arguments):
+        if tool_name not in ('slow_task', 'flaky_write', 'flaky_read'):
+            return super()._execute_tool(tool_name, arguments)
+        with self.lock:
+            count = self.executions[tool_name] = self.executions.get(tool_name, 0) + 1
+        if tool_name == 'slow_task':
+            time.sleep(arguments.get('delay', 0))
+        elif count == 1:
+            # The handler dies without answering, so the client sees the connection drop
+            raise ConnectionAbortedError(f'{tool_name} dropped')
+        return {'tool': tool_name, 'executions': count}
+
+
+def check_timeout(emulator, base):
+    client = MCPClient(base, timeout=(1, 0.2))
+    assert client.connect(), "connect failed"
+    started = time.perf_counter()
+    result = client.call_tool('slow_task', {'delay': 1})
+    elapsed = time.perf_counter() - started
+    assert result is None, f"expected the call to time out, got {result}"
+    assert elapsed < 0.6, f"read timeout took {elapsed:.2f}s"
+    assert emulator.executions['slow_task'] == 1, \
+        f"timed-out call was sent {emulator.executions['slow_task']} times"
+
+
+def check_only_read_only_tools_retried(emulator, base):
+    client = MCPClient(base)
+    assert client.connect(), "connect failed"
+
+    result = client.call_tool('flaky_write', {})
+    assert result is None, f"expected the dropped write to fail, got {result}"
+    assert emulator.executions['flaky_write'] == 1, \
+        f"non-idempotent POST was sent {emulator.executions['flaky_write']} times"
+
+    result = client.call_tool('flaky_read', {})
+    assert result == {'tool': 'flaky_read', 'executions': 2}, f"read-only call was not retried: {result}"
+
+
+def check_expired_session(emulator, base):
+    client = MCPClient(base)
+    assert client.connect(), "connect failed"
+    old_session = client.session_id
+
+    emulator.sessions.clear()  # The server forgets every session, as after a restart
+    tools = client.list_tools(refresh=True)
+    assert tools, "tool list was not fetched after the session expired"
+    assert client.session_id not in (None, old_session), "no new session was opened"
+    assert client.session_id in emulator.sessions, "client holds a session the server doesn't know"
+
+
+def main():
+    # Keep backoff short so the retry check finishes quickly
+    http_client.BACKOFF_BASE = 0.01
+    emulator = StubEmulator()
+    server = emulator.serve_http('localhost', 0)
+    server.handle_error = lambda request, client_address: None  # flaky tools drop connections on purpose
+    base = f"http://localhost:{server.server_address[1]}"
+
+    failures = 0
+    for check in (check_timeout, check_only_read_only_tools_retried, check_expired_session):
+        try:
+            check(emulator, base)
+            print(f"PASS {check.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL {check.__name__}: {e}")
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
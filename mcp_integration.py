@@ -1,8 +1,44 @@
 # mcp_integration.py
+import hashlib
 import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+
 import requests
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+
+import http_client
+from mcp_schema import compile_schema
+from mcp_transport import (
+    JSONRPC_INVALID_PARAMS, JSONRPC_INVALID_REQUEST, JSONRPC_METHOD_NOT_FOUND, JSONRPC_PARSE_ERROR,
+    LOOPBACK_HOSTS, PROTOCOL_VERSION, SSETransport, StdioTransport, tool_result, unwrap_tool_result
+)
+from sentiment import analyze_sentiment, analyze_sentiment_batch
+
+# Statuses with which a server rejects an unknown or expired X-Session-ID
+SESSION_REJECTED_STATUSES = (401, 403)
+
+# Seconds a cached tool list is trusted before it is revalidated with If-None-Match
+CATALOGUE_TTL = 300
+# Response header carrying the server's current catalogue ETag
+TOOLS_ETAG_HEADER = 'X-Tools-ETag'
+_NOT_MODIFIED = object()
+
+# Threads MCPManager.execute_many uses to run tool calls side by side
+MCP_WORKERS = 8
+
+# Characters of tool output per progress notification when a client asks for streaming
+STREAM_CHUNK_SIZE = 1024
+# Seconds between keepalive comments on an idle SSE stream
+SSE_KEEPALIVE = 15
 
 @dataclass
 class Tool:
@@ -11,79 +47,199 @@ class Tool:
     description: str
     input_schema: Dict
     output_schema: Dict
+    # MCP tool annotations, e.g. {'readOnlyHint': True}; read-only and idempotent tools are safe to retry
+    annotations: Dict = field(default_factory=dict)
     
     def to_mcp_format(self):
-        return {
+        tool = {
             'name': self.name,
             'description': self.description,
             'inputSchema': self.input_schema,
             'outputSchema': self.output_schema
         }
+        if self.annotations:
+            tool['annotations'] = self.annotations
+        return tool
+
+class ToolCatalogue:
+    """
+    Snapshot of a server's tools in MCP format. The {"tools": [...]} body is
+    serialized once, its hash is the ETag, and each tool's inputSchema is
+    compiled into an argument validator the first time the tool is used.
+    """
+    
+    def __init__(self, tools: List[Dict], etag: str = None):
+        self.tools = tools
+        self.index = {tool.get('name'): tool for tool in tools}
+        tools_json = json.dumps(tools, separators=(',', ':'))
+        self.etag = etag or hashlib.sha1(tools_json.encode('utf-8')).hexdigest()[:16]
+        self.body = f'{{"tools":{tools_json},"etag":{json.dumps(self.etag)}}}'.encode('utf-8')
+        self.fetched_at = time.monotonic()
+        self._validators = {}
+    
+    def get(self, tool_name: str) -> Optional[Dict]:
+        return self.index.get(tool_name)
+    
+    def validate(self, tool_name: str, arguments: Dict) -> List[str]:
+        """Error messages for arguments that break the tool's inputSchema; [] for unknown tools"""
+        validator = self._validators.get(tool_name)
+        if validator is None:
+            tool = self.index.get(tool_name)
+            if tool is None:
+                return []
+            validator = self._validators[tool_name] = compile_schema(tool.get('inputSchema'))
+        return validator(arguments)
 
 class MCPClient:
     """
-    MCP Client for connecting to Model Context Protocol servers
+    MCP Client for connecting to Model Context Protocol servers.
+    Requests share http_client's keep-alive connection pool and carry
+    (connect, read) timeouts. Read-only calls are retried on connection
+    errors and 5xx responses, and a rejected session is re-established
+    once before the request is repeated.
+    The tool list is cached as a ToolCatalogue and only refetched when the
+    server reports a new ETag or the cache is older than CATALOGUE_TTL;
+    tool arguments are validated against it before a call is sent.
     """
     
-    def __init__(self, server_url: str = "http://localhost:3000"):
+    def __init__(self, server_url: str = "http://localhost:3000", timeout=http_client.DEFAULT_TIMEOUT,
+                 retries: int = http_client.MAX_RETRIES):
         self.server_url = server_url
         self.session_id = None
         self.available_tools = []
+        self.catalogue = None
+        self.timeout = timeout
+        self.retries = retries
+        self._catalogue_stale = False
+        self._batch_supported = True
+        self._session_lock = threading.Lock()
+        self._http = None
+        self._http_host = None
+    
+    @property
+    def http(self):
+        """
+        Pooled HTTP session; local servers skip the proxy environment lookup.
+        The server's per-host cap is raised to MCP_WORKERS so execute_many's
+        parallel calls are not queued behind http_client's default.
+        """
+        url = urlparse(self.server_url)
+        if self._http is None or url.netloc != self._http_host:
+            self._http = http_client.new_session(trust_env=url.hostname not in LOOPBACK_HOSTS)
+            self._http_host = url.netloc
+            http_client.set_host_limit(url.netloc, MCP_WORKERS)
+        return self._http
     
     def connect(self) -> bool:
         """Connect to MCP server"""
         try:
-            response = requests.post(
-                f"{self.server_url}/connect",
-                json={'client': 'optimus_prime'}
-            )
-            if response.status_code == 200:
-                data = response.json()
+            data = self._request('POST', '/connect', {'client': 'optimus_prime'}, with_session=False)
+            if data is not None:
                 self.session_id = data.get('session_id')
-                self.available_tools = data.get('tools', [])
+                self._set_tools(data.get('tools', []), data.get('etag'))
                 return True
         except Exception as e:
             print(f"MCP Connection error: {e}")
         return False
     
-    def list_tools(self) -> List[Dict]:
-        """List available tools from MCP server"""
+    def list_tools(self, refresh: bool = False) -> List[Dict]:
+        """List available tools, from the cache unless it is stale or refresh is set"""
+        catalogue = self.catalogue
+        if catalogue is not None and not refresh and not self._is_stale(catalogue):
+            return catalogue.tools
+        
         try:
-            response = requests.get(
-                f"{self.server_url}/tools",
-                headers={'X-Session-ID': self.session_id}
-            )
-            if response.status_code == 200:
-                self.available_tools = response.json().get('tools', [])
+            headers = {'If-None-Match': f'"{catalogue.etag}"'} if catalogue is not None else None
+            data = self._request('GET', '/tools', idempotent=True, headers=headers)
+            if data is _NOT_MODIFIED:
+                catalogue.fetched_at = time.monotonic()
+                self._catalogue_stale = False
+                return catalogue.tools
+            if data is not None:
+                self._set_tools(data.get('tools', []), data.get('etag'))
                 return self.available_tools
         except Exception as e:
             print(f"MCP List tools error: {e}")
         return []
     
+    def validate_arguments(self, tool_name: str, arguments: Dict) -> List[str]:
+        """Check arguments against the cached inputSchema; [] if valid or the tool is unknown"""
+        catalogue = self.catalogue
+        if catalogue is None:
+            return []
+        errors = catalogue.validate(tool_name, arguments)
+        if errors and self._is_stale(catalogue):
+            # The schema may have changed on the server since it was cached
+            self.list_tools()
+            if self.catalogue is not catalogue:
+                errors = self.catalogue.validate(tool_name, arguments)
+        return errors
+    
     def call_tool(self, tool_name: str, arguments: Dict) -> Optional[Dict]:
         """Call a tool through MCP"""
+        errors = self.validate_arguments(tool_name, arguments)
+        if errors:
+            return {'error': f"Invalid arguments for {tool_name}: {'; '.join(errors)}"}
+        
         try:
-            response = requests.post(
-                f"{self.server_url}/tools/{tool_name}/call",
-                headers={'X-Session-ID': self.session_id},
-                json={'arguments': arguments}
-            )
-            if response.status_code == 200:
-                return response.json()
+            return self._request('POST', f'/tools/{tool_name}/call', {'arguments': arguments},
+                                 idempotent=self.is_retry_safe(tool_name))
         except Exception as e:
             print(f"MCP Tool call error for {tool_name}: {e}")
         return None
     
+    def call_batch(self, calls: Sequence[Tuple[str, Dict]], timeout: float = None) -> Optional[List[Dict]]:
+        """
+        Send several tool calls as one JSON-RPC 2.0 batch to /rpc and return
+        their outputs in order; if the request fails every call gets an
+        {'error': ...} result. Returns None if the server does not take
+        batches, after which the client stops offering them.
+        """
+        if not self._batch_supported:
+            return None
+        
+        results = [None] * len(calls)
+        batch = []
+        for i, (tool_name, arguments) in enumerate(calls):
+            errors = self.validate_arguments(tool_name, arguments)
+            if errors:
+                results[i] = {'error': f"Invalid arguments for {tool_name}: {'; '.join(errors)}"}
+            else:
+                batch.append({'jsonrpc': '2.0', 'id': i, 'method': 'tools/call',
+                              'params': {'name': tool_name, 'arguments': arguments}})
+        if not batch:
+            return results
+        
+        request_timeout = self.timeout
+        if timeout is not None:
+            connect_timeout = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+            request_timeout = (min(connect_timeout, timeout), timeout)
+        # Retrying would overrun a deadline, so only deadline-free batches of safe calls are retried
+        idempotent = timeout is None and all(self.is_retry_safe(c['params']['name']) for c in batch)
+        try:
+            replies = self._request('POST', '/rpc', batch, timeout=request_timeout, idempotent=idempotent)
+        except Exception as e:
+            print(f"MCP Batch call error: {e}")
+            return [result or {'error': f'{calls[i][0]} failed: {e}'} for i, result in enumerate(results)]
+        if not isinstance(replies, list):
+            self._batch_supported = False
+            return None
+        
+        for reply in replies:
+            i = reply.get('id') if isinstance(reply, dict) else None
+            if not isinstance(i, int) or not 0 <= i < len(results):
+                continue
+            if 'error' in reply:
+                results[i] = {'error': reply['error'].get('message', 'JSON-RPC error')}
+            else:
+                results[i] = unwrap_tool_result(reply.get('result'))
+        return [result if result is not None else {'error': f'No reply for {calls[i][0]}'}
+                for i, result in enumerate(results)]
+    
     def get_context(self, query: str) -> Optional[Dict]:
         """Get relevant context for a query"""
         try:
-            response = requests.post(
-                f"{self.server_url}/context",
-                headers={'X-Session-ID': self.session_id},
-                json={'query': query}
-            )
-            if response.status_code == 200:
-                return response.json()
+            return self._request('POST', '/context', {'query': query}, idempotent=True)
         except Exception as e:
             print(f"MCP Context error: {e}")
         return None
@@ -92,13 +248,84 @@ class MCPClient:
         """Disconnect from MCP server"""
         if self.session_id:
             try:
-                requests.post(
+                http_client.request(
+                    'POST',
                     f"{self.server_url}/disconnect",
+                    retries=0,
+                    timeout=self.timeout,
+                    session=self.http,
                     headers={'X-Session-ID': self.session_id}
-                )
+                ).close()
             except:
                 pass
             self.session_id = None
+    
+    def is_retry_safe(self, tool_name: str) -> bool:
+        """True if the server marks the tool read-only or idempotent"""
+        tool = self.catalogue.get(tool_name) if self.catalogue is not None else None
+        annotations = (tool or {}).get('annotations') or {}
+        return bool(annotations.get('readOnlyHint') or annotations.get('idempotentHint'))
+    
+    def _set_tools(self, tools: List[Dict], etag: str = None):
+        self.catalogue = ToolCatalogue(tools, etag)
+        self.available_tools = self.catalogue.tools
+        self._catalogue_stale = False
+    
+    def _is_stale(self, catalogue: ToolCatalogue) -> bool:
+        return self._catalogue_stale or time.monotonic() - catalogue.fetched_at > CATALOGUE_TTL
+    
+    def _request(self, method: str, path: str, payload: Dict = None, idempotent: bool = False,
+                 with_session: bool = True, headers: Dict = None, timeout=None) -> Optional[Dict]:
+        """
+        Send a request through the pooled session and return the JSON body
+        of a 200 response, _NOT_MODIFIED for a 304, or None. Connection
+        errors and timeouts raise.
+        """
+        for attempt in range(2):
+            session_id = self.session_id
+            request_headers = dict(headers) if headers else {}
+            if with_session and session_id:
+                request_headers['X-Session-ID'] = session_id
+            response = http_client.request(
+                method,
+                f"{self.server_url}{path}",
+                retries=self.retries if idempotent else 0,
+                timeout=timeout or self.timeout,
+                session=self.http,
+                headers=request_headers,
+                json=payload
+            )
+            
+            server_etag = response.headers.get(TOOLS_ETAG_HEADER)
+            if server_etag and self.catalogue is not None and server_etag != self.catalogue.etag:
+                self._catalogue_stale = True
+            if response.status_code == 304:
+                return _NOT_MODIFIED
+            
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            
+            if with_session and attempt == 0 and self._session_rejected(response, data):
+                if self._reconnect(session_id):
+                    continue
+                return None
+            return data if response.status_code == 200 else None
+    
+    @staticmethod
+    def _session_rejected(response: requests.Response, data) -> bool:
+        if response.status_code in SESSION_REJECTED_STATUSES:
+            return True
+        # Some servers report it in the body of a 200
+        return isinstance(data, dict) and str(data.get('error', '')).lower() == 'invalid session'
+    
+    def _reconnect(self, stale_session_id: Optional[str]) -> bool:
+        """Open a new session unless another thread already replaced the stale one"""
+        with self._session_lock:
+            if self.session_id != stale_session_id and self.session_id is not None:
+                return True
+            return self.connect()
 
 class MCPServerEmulator:
     """
@@ -108,6 +335,13 @@ class MCPServerEmulator:
     def __init__(self):
         self.tools = self._initialize_tools()
         self.sessions = {}
+        self.catalogue = ToolCatalogue([tool.to_mcp_format() for tool in self.tools.values()])
+        self._pool = None
+    
+    def register_tool(self, tool: Tool):
+        """Add or replace a tool; clients see the new catalogue ETag on their next response"""
+        self.tools[tool.name] = tool
+        self.catalogue = ToolCatalogue([tool.to_mcp_format() for tool in self.tools.values()])
     
     def _initialize_tools(self) -> Dict[str, Tool]:
         """Initialize MCP tools for Optimus Prime"""
@@ -129,7 +363,8 @@ class MCPServerEmulator:
                         'results': {'type': 'array', 'items': {'type': 'string'}},
                         'count': {'type': 'integer'}
                     }
-                }
+                },
+                annotations={'readOnlyHint': True}
             ),
             'analyze_text': Tool(
                 name='analyze_text',
@@ -138,9 +373,11 @@ class MCPServerEmulator:
                     'type': 'object',
                     'properties': {
                         'text': {'type': 'string', 'description': 'Text to analyze'},
+                        'texts': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Texts to analyze in one batch'},
                         'analysis_type': {'type': 'string', 'enum': ['sentiment', 'entities', 'summary']}
                     },
-                    'required': ['text']
+                    # 'texts' may be sent instead of 'text'
+                    'required': []
                 },
                 output_schema={
                     'type': 'object',
@@ -148,7 +385,8 @@ class MCPServerEmulator:
                         'analysis': {'type': 'object'},
                         'summary': {'type': 'string'}
                     }
-                }
+                },
+                annotations={'readOnlyHint': True}
             ),
             'code_generation': Tool(
                 name='code_generation',
@@ -169,7 +407,8 @@ class MCPServerEmulator:
                         'explanation': {'type': 'string'},
                         'language': {'type': 'string'}
                     }
-                }
+                },
+                annotations={'readOnlyHint': True}
             )
         }
         return tools
@@ -184,22 +423,37 @@ class MCPServerEmulator:
             }
             return {
                 'session_id': session_id,
-                'tools': [tool.to_mcp_format() for tool in self.tools.values()]
+                'tools': self.catalogue.tools,
+                'etag': self.catalogue.etag
             }
         
         elif endpoint == '/tools':
             if session_id not in self.sessions:
                 return {'error': 'Invalid session'}
-            return {'tools': [tool.to_mcp_format() for tool in self.tools.values()]}
+            return {'tools': self.catalogue.tools, 'etag': self.catalogue.etag}
         
         elif endpoint.startswith('/tools/') and '/call' in endpoint:
             tool_name = endpoint.split('/')[2]
             if tool_name in self.tools:
-                return self._execute_tool(tool_name, data.get('arguments', {}))
+                arguments = data.get('arguments', {})
+                errors = self.catalogue.validate(tool_name, arguments)
+                if errors:
+                    return {'error': f"Invalid arguments for {tool_name}: {'; '.join(errors)}"}
+                return self._execute_tool(tool_name, arguments)
         
         elif endpoint == '/context':
             return self._get_context(data.get('query', ''))
         
+        elif endpoint == '/rpc':
+            if isinstance(data, list):
+                # Batch entries run side by side, so the batch takes as long as its slowest call
+                if len(data) > 1:
+                    replies = list(self._get_pool().map(self.handle_rpc, data))
+                else:
+                    replies = [self.handle_rpc(message) for message in data]
+                return [reply for reply in replies if reply is not None]
+            return self.handle_rpc(data)
+        
         elif endpoint == '/disconnect':
             if session_id in self.sessions:
                 del self.sessions[session_id]
@@ -207,6 +461,107 @@ class MCPServerEmulator:
         
         return {'error': 'Invalid endpoint'}
     
+    def handle_rpc(self, message: Dict, notify=None) -> Optional[Dict]:
+        """
+        Handle one JSON-RPC 2.0 message; returns None for notifications.
+        When `notify` is given and a tools/call carries a progressToken, the
+        output text is sent through it in notifications/progress chunks
+        before the reply is returned.
+        """
+        if not isinstance(message, dict) or message.get('jsonrpc') != '2.0' or 'method' not in message:
+            return self._rpc_error(None, JSONRPC_INVALID_REQUEST, 'Invalid request')
+        
+        message_id = message.get('id')
+        method = message['method']
+        params = message.get('params') or {}
+        if method.startswith('notifications/'):
+            return None
+        elif method == 'initialize':
+            reply = {'jsonrpc': '2.0', 'id': message_id, 'result': {
+                'protocolVersion': PROTOCOL_VERSION,
+                'capabilities': {'tools': {'listChanged': False}},
+                'serverInfo': {'name': 'optimus-mcp-emulator', 'version': '1.0'}
+            }}
+        elif method == 'ping':
+            reply = {'jsonrpc': '2.0', 'id': message_id, 'result': {}}
+        elif method == 'tools/list':
+            reply = {'jsonrpc': '2.0', 'id': message_id, 'result': {'tools': self.catalogue.tools}}
+        elif method == 'tools/call':
+            tool_name = params.get('name')
+            if tool_name in self.tools:
+                output = self.handle_request(f'/tools/{tool_name}/call', {'arguments': params.get('arguments') or {}})
+                result = tool_result(output)
+                token = (params.get('_meta') or {}).get('progressToken')
+                if notify is not None and token is not None:
+                    self._stream_output(result['content'][0]['text'], token, notify)
+                reply = {'jsonrpc': '2.0', 'id': message_id, 'result': result}
+            else:
+                reply = self._rpc_error(message_id, JSONRPC_INVALID_PARAMS, f'Unknown tool: {tool_name}')
+        else:
+            reply = self._rpc_error(message_id, JSONRPC_METHOD_NOT_FOUND, f'Method not found: {method}')
+        
+        # Notifications (no id) never get a reply
+        return reply if 'id' in message else None
+    
+    @staticmethod
+    def _rpc_error(message_id, code: int, text: str) -> Dict:
+        return {'jsonrpc': '2.0', 'id': message_id, 'error': {'code': code, 'message': text}}
+    
+    @staticmethod
+    def _stream_output(text: str, token, notify):
+        for start in range(0, len(text), STREAM_CHUNK_SIZE):
+            chunk = text[start:start + STREAM_CHUNK_SIZE]
+            notify({'jsonrpc': '2.0', 'method': 'notifications/progress', 'params': {
+                'progressToken': token,
+                'progress': start + len(chunk),
+                'total': len(text),
+                'message': chunk
+            }})
+    
+    def _handle_rpc_text(self, text: str, send):
+        """Parse a message or batch, handle it and pass the reply (if any) to send"""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            send(self._rpc_error(None, JSONRPC_PARSE_ERROR, 'Parse error'))
+            return
+        if isinstance(data, list):
+            replies = [reply for reply in (self.handle_rpc(message, send) for message in data) if reply]
+            if replies:
+                send(replies)
+        else:
+            reply = self.handle_rpc(data, send)
+            if reply is not None:
+                send(reply)
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=MCP_WORKERS, thread_name_prefix='mcp-server')
+        return self._pool
+    
+    def serve_stdio(self, input=None, output=None):
+        """
+        Serve JSON-RPC on stdin/stdout, one message per line, until stdin
+        closes. Messages are handled concurrently, so a slow call does not
+        hold up the ones behind it and replies may arrive out of order.
+        """
+        input = input or sys.stdin
+        output = output or sys.stdout
+        write_lock = threading.Lock()
+        
+        def send(message):
+            line = json.dumps(message, separators=(',', ':'))
+            with write_lock:
+                output.write(line + '\n')
+                output.flush()
+        
+        pool = self._get_pool()
+        for line in input:
+            if line.strip():
+                pool.submit(self._handle_rpc_text, line, send)
+        pool.shutdown(wait=True)
+        self._pool = None
+    
     def _execute_tool(self, tool_name: str, arguments: Dict) -> Dict:
         """Execute MCP tool"""
         if tool_name == 'search_web':
@@ -227,13 +582,25 @@ class MCPServerEmulator:
             analysis_type = arguments.get('analysis_type', 'sentiment')
             
             if analysis_type == 'sentiment':
+                texts = arguments.get('texts')
+                if texts:
+                    results = analyze_sentiment_batch(texts)
+                    return {
+                        'analysis': {
+                            'sentiments': [result['type'] for result in results],
+                            'scores': [result['score'] for result in results]
+                        },
+                        'summary': f"Analyzed {len(results)} texts"
+                    }
+                
+                result = analyze_sentiment(text)
                 return {
                     'analysis': {
-                        'sentiment': 'positive',
-                        'confidence': 0.85,
+                        'sentiment': result['type'],
+                        'confidence': min(result['confidence'], 1.0),
                         'keywords': text.split()[:5]
                     },
-                    'summary': f"Text appears positive with keywords: {', '.join(text.split()[:3])}"
+                    'summary': f"Text appears {result['type']} with keywords: {', '.join(text.split()[:3])}"
                 }
         
         elif tool_name == 'code_generation':
@@ -247,7 +614,114 @@ class MCPServerEmulator:
             }
         
         return {'error': f'Tool {tool_name} not implemented'}
-
+    
+    def serve_http(self, host: str = 'localhost', port: int = 3000) -> ThreadingHTTPServer:
+        """
+        Serve the emulator over HTTP on a background thread, in the REST
+        shape MCPClient speaks, plus JSON-RPC at /rpc and MCP's HTTP+SSE
+        transport (GET /sse, POST /messages). Call shutdown() on the result
+        to stop it.
+        """
+        emulator = self
+        streams = {}  # SSE stream id -> queue of outgoing messages
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+            # Send headers and body in one write; separate small writes stall on delayed ACKs
+            wbufsize = -1
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                if self.path == '/sse':
+                    self._serve_sse()
+                    return
+                if self.path == '/tools' and self.headers.get('X-Session-ID') in emulator.sessions:
+                    # Served from the pre-serialized catalogue; 304 if the client's copy is current
+                    catalogue = emulator.catalogue
+                    if self.headers.get('If-None-Match', '').strip('"') == catalogue.etag:
+                        self._send_body(304, b'')
+                    else:
+                        self._send_body(200, catalogue.body)
+                    return
+                self._respond({})
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if self.path.startswith('/messages'):
+                    stream_id = parse_qs(urlparse(self.path).query).get('session_id', [''])[0]
+                    events = streams.get(stream_id)
+                    if events is None:
+                        self._send(404, {'error': 'Unknown SSE session'})
+                        return
+                    # Accept at once; the reply goes out on the event stream when ready
+                    self._send_body(202, b'')
+                    emulator._get_pool().submit(emulator._handle_rpc_text, body.decode('utf-8'), events.put)
+                    return
+                try:
+                    data = json.loads(body) if body else {}
+                except ValueError:
+                    self._send(400, {'error': 'Invalid JSON'})
+                    return
+                self._respond(data)
+            
+            def _serve_sse(self):
+                stream_id = uuid.uuid4().hex
+                events = queue.Queue()
+                streams[stream_id] = events
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    self._write_chunk(f'event: endpoint\ndata: /messages?session_id={stream_id}\n\n')
+                    while True:
+                        try:
+                            message = events.get(timeout=SSE_KEEPALIVE)
+                        except queue.Empty:
+                            self._write_chunk(': keepalive\n\n')
+                            continue
+                        self._write_chunk(f'event: message\ndata: {json.dumps(message)}\n\n')
+                except OSError:
+                    pass  # Client went away
+                finally:
+                    streams.pop(stream_id, None)
+            
+            def _write_chunk(self, text):
+                # One HTTP chunk per event, flushed so the client sees it immediately
+                data = text.encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+            
+            def _respond(self, data):
+                result = emulator.handle_request(self.path, data, self.headers.get('X-Session-ID'))
+                error = result.get('error') if isinstance(result, dict) else None
+                status = {'Invalid session': 401, 'Invalid endpoint': 404}.get(error, 200)
+                self._send(status, result)
+            
+            def _send(self, status, result):
+                self._send_body(status, json.dumps(result).encode('utf-8'))
+            
+            def _send_body(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', f'"{emulator.catalogue.etag}"')
+                self.send_header(TOOLS_ETAG_HEADER, emulator.catalogue.etag)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+    
     def _get_context(self, query: str) -> Dict:
         """Get context for query"""
         # Simulate context retrieval
@@ -269,30 +743,94 @@ class MCPManager:
         self.mcp_client = MCPClient()
         self.mcp_server = MCPServerEmulator()
         self.is_connected = False
+        self.remote_connected = False  # the REST client holds a connection to an external server
+        self.use_local = False  # use_local_server() chose the in-process emulator
+        # JSON-RPC channel (stdio or SSE); takes precedence over the REST client when set
+        self.transport = None
+        self.transport_catalogue = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
     
     def connect_to_server(self, server_url: str = None):
         """Connect to external MCP server"""
         if server_url:
             self.mcp_client.server_url = server_url
         
-        self.is_connected = self.mcp_client.connect()
+        self.remote_connected = self.mcp_client.connect()
+        if self.remote_connected:
+            self.use_local = False
+        self.is_connected = self.remote_connected
         return self.is_connected
     
+    def connect_stdio(self, command: Sequence[str] = None) -> bool:
+        """
+        Start an MCP server subprocess and talk JSON-RPC to it over stdio.
+        Defaults to this module's emulator (python mcp_integration.py --stdio).
+        """
+        if command is None:
+            command = [sys.executable, os.path.abspath(__file__), '--stdio']
+        try:
+            return self._use_transport(StdioTransport(command))
+        except Exception as e:
+            print(f"MCP stdio connection error: {e}")
+            return False
+    
+    def connect_sse(self, server_url: str = None) -> bool:
+        """Connect to an MCP server over the HTTP+SSE transport"""
+        try:
+            return self._use_transport(SSETransport(server_url or self.mcp_client.server_url))
+        except Exception as e:
+            print(f"MCP SSE connection error: {e}")
+            return False
+    
+    def _use_transport(self, transport) -> bool:
+        try:
+            transport.initialize()
+            catalogue = ToolCatalogue(transport.list_tools())
+        except Exception:
+            transport.close()
+            raise
+        self.close_transport()
+        self.transport = transport
+        self.transport_catalogue = catalogue
+        self.is_connected = True
+        return True
+    
+    def close_transport(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+            self.transport_catalogue = None
+    
     def use_local_server(self):
         """Use local MCP server emulator"""
+        self.use_local = True
+        self.remote_connected = False
         self.is_connected = True
         return True
     
+    @property
+    def _remote(self) -> bool:
+        """True when calls go to a connected server rather than the local emulator"""
+        return self.remote_connected and not self.use_local
+    
     def get_tools(self):
-        """Get available MCP tools"""
-        if self.is_connected:
+        """Get available MCP tools (cached; see ToolCatalogue)"""
+        if self.transport is not None:
+            return self.transport_catalogue.tools
+        if self._remote:
             return self.mcp_client.list_tools()
         else:
-            return [tool.to_mcp_format() for tool in self.mcp_server.tools.values()]
+            return self.mcp_server.catalogue.tools
     
     def execute_mcp_tool(self, tool_name: str, arguments: Dict):
         """Execute MCP tool"""
-        if self.is_connected and hasattr(self.mcp_client, 'call_tool'):
+        if self.transport is not None:
+            errors = self.transport_catalogue.validate(tool_name, arguments)
+            if errors:
+                return {'error': f"Invalid arguments for {tool_name}: {'; '.join(errors)}"}
+            return self.transport.call_tool(tool_name, arguments)
+        if self._remote:
             return self.mcp_client.call_tool(tool_name, arguments)
         else:
             return self.mcp_server.handle_request(
@@ -301,13 +839,114 @@ class MCPManager:
                 'local_session'
             )
     
+    def execute_many(self, calls: Sequence[Tuple], timeout: float = None, batch: bool = False) -> List[Dict]:
+        """
+        Run several tool calls concurrently and return their results in
+        order, so a plan takes as long as its slowest call. Each call is
+        (tool_name, arguments) or (tool_name, arguments, timeout); `timeout`
+        bounds the whole set. A call that fails or finishes after its own
+        deadline gets an {'error': ...} result and the others are unaffected.
+        With batch=True the calls go to a connected server as one JSON-RPC
+        batch, falling back to parallel calls if the server can't take it.
+        """
+        calls = [tuple(call) for call in calls]
+        if not calls:
+            return []
+        
+        started = time.monotonic()
+        deadlines = []
+        for call in calls:
+            limits = [limit for limit in (timeout, call[2] if len(call) > 2 else None) if limit is not None]
+            deadlines.append(started + min(limits) if limits else None)
+        
+        # Over a JSON-RPC transport the parallel calls are already pipelined on one channel
+        if batch and self._remote and self.transport is None:
+            batch_timeout = None if None in deadlines else max(deadlines) - started
+            results = self.mcp_client.call_batch([call[:2] for call in calls], timeout=batch_timeout)
+            if results is not None:
+                # The batch answers at once; entries with a tighter deadline than the batch missed it
+                finished_at = time.monotonic()
+                return [
+                    self._timed_out(call[0], deadline, started)
+                    if deadline is not None and finished_at > deadline else result
+                    for call, deadline, result in zip(calls, deadlines, results)
+                ]
+        
+        def run(tool_name, arguments):
+            # Completion time is taken in the worker, so each result is judged against its own deadline
+            return self.execute_mcp_tool(tool_name, arguments), time.monotonic()
+        
+        pool = self._get_pool()
+        futures = {pool.submit(run, call[0], call[1]): i for i, call in enumerate(calls)}
+        results = [None] * len(calls)
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for future in [future for future in pending if deadlines[futures[future]] is not None
+                           and deadlines[futures[future]] <= now and not future.done()]:
+                i = futures[future]
+                future.cancel()
+                pending.discard(future)
+                results[i] = self._timed_out(calls[i][0], deadlines[i], started)
+            
+            upcoming = [deadlines[futures[future]] for future in pending if deadlines[futures[future]] is not None]
+            wait_for = max(0.0, min(upcoming) - now) if upcoming else None
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                tool_name, deadline = calls[i][0], deadlines[i]
+                try:
+                    result, finished_at = future.result()
+                except Exception as e:
+                    results[i] = {'error': f'{tool_name} failed: {e}'}
+                    continue
+                if deadline is not None and finished_at > deadline:
+                    results[i] = self._timed_out(tool_name, deadline, started)
+                else:
+                    results[i] = result if result is not None else {'error': f'{tool_name} failed'}
+        return results
+    
+    @staticmethod
+    def _timed_out(tool_name: str, deadline: float, started: float) -> Dict:
+        return {'error': f'{tool_name} timed out after {deadline - started:.2f}s'}
+    
+    def stream_mcp_tool(self, tool_name: str, arguments: Dict) -> Iterator[str]:
+        """
+        Yield a tool's output text as it arrives. Only a JSON-RPC transport
+        streams; other paths yield the whole output once.
+        """
+        if self.transport is not None:
+            errors = self.transport_catalogue.validate(tool_name, arguments)
+            if not errors:
+                yield from self.transport.stream_tool(tool_name, arguments)
+                return
+        yield json.dumps(self.execute_mcp_tool(tool_name, arguments))
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=MCP_WORKERS, thread_name_prefix='mcp')
+        return self._pool
+    
     def get_context_for_query(self, query: str):
         """Get MCP context for query"""
-        if self.is_connected and hasattr(self.mcp_client, 'get_context'):
+        if self._remote:
             return self.mcp_client.get_context(query)
         else:
             return self.mcp_server.handle_request(
                 '/context',
                 {'query': query},
                 'local_session'
-            )
\ No newline at end of file
+            )
+
+if __name__ == '__main__':
+    # python mcp_integration.py [--stdio | --http PORT]: run the emulator as a local MCP server
+    if '--http' in sys.argv:
+        server = MCPServerEmulator().serve_http(port=int(sys.argv[sys.argv.index('--http') + 1]))
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        MCPServerEmulator().serve_stdio()
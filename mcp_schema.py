@@ -0,0 +1,159 @@
+# mcp_schema.py
+"""
+Validation for MCP tool arguments against a tool's inputSchema.
+A schema is compiled once into nested checker functions, so validating a
+call is a handful of dict lookups and isinstance checks rather than a walk
+over the schema document. Covers the JSON Schema subset tool schemas use
+(type, enum, const, properties, required, additionalProperties, items and
+the length/range/pattern bounds); other keywords are ignored.
+"""
+import re
+from typing import Callable, Dict, List
+
+# checker(value, path, errors) appends a message per violation
+Checker = Callable[[object, str, List[str]], None]
+
+_TYPE_CHECKS = {
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: (isinstance(value, int) and not isinstance(value, bool))
+                             or (isinstance(value, float) and value.is_integer()),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'null': lambda value: value is None,
+}
+
+
+def compile_schema(schema: Dict) -> Callable[[object], List[str]]:
+    """Compile a schema into validate(value) -> list of error messages (empty if valid)"""
+    checker = _compile(schema or {})
+
+    def validate(value) -> List[str]:
+        errors = []
+        checker(value, '', errors)
+        return errors
+
+    return validate
+
+
+def _compile(schema: Dict) -> Checker:
+    checks = []
+
+    types = schema.get('type')
+    if types is not None:
+        type_names = [types] if isinstance(types, str) else list(types)
+        type_checks = [_TYPE_CHECKS[name] for name in type_names if name in _TYPE_CHECKS]
+        expected = ' or '.join(type_names)
+        if type_checks:
+            def check_type(value, path, errors):
+                if not any(check(value) for check in type_checks):
+                    errors.append(f"{path or 'arguments'}: expected {expected}, got {type(value).__name__}")
+                    return False
+                return True
+            checks.append(check_type)
+
+    if 'enum' in schema:
+        allowed = list(schema['enum'])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path or 'arguments'}: {value!r} is not one of {allowed}")
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append(f"{path or 'arguments'}: expected {const!r}")
+        checks.append(check_const)
+
+    checks.extend(_compile_bounds(schema))
+
+    if 'properties' in schema or 'required' in schema or 'additionalProperties' in schema:
+        checks.append(_compile_object(schema))
+
+    if 'items' in schema and isinstance(schema['items'], dict):
+        item_checker = _compile(schema['items'])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_checker(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    def check(value, path, errors):
+        for step in checks:
+            # A failed type check makes the remaining checks meaningless
+            if step(value, path, errors) is False:
+                return
+    return check
+
+
+def _compile_object(schema: Dict) -> Checker:
+    properties = {name: _compile(sub) for name, sub in (schema.get('properties') or {}).items()}
+    required = list(schema.get('required') or ())
+    additional = schema.get('additionalProperties', True)
+    additional_checker = _compile(additional) if isinstance(additional, dict) else None
+
+    def check_object(value, path, errors):
+        if not isinstance(value, dict):
+            return
+        prefix = f"{path}." if path else ''
+        for name in required:
+            if name not in value:
+                errors.append(f"{prefix}{name}: required")
+        for name, item in value.items():
+            checker = properties.get(name)
+            if checker is not None:
+                checker(item, f"{prefix}{name}", errors)
+            elif additional is False:
+                errors.append(f"{prefix}{name}: unexpected property")
+            elif additional_checker is not None:
+                additional_checker(item, f"{prefix}{name}", errors)
+    return check_object
+
+
+def _compile_bounds(schema: Dict) -> List[Checker]:
+    checks = []
+
+    def bound(keyword, applies, measure, fails, describe):
+        limit = schema[keyword]
+
+        def check(value, path, errors):
+            if applies(value) and fails(measure(value), limit):
+                errors.append(f"{path or 'arguments'}: {describe} {limit}")
+        checks.append(check)
+
+    is_number = _TYPE_CHECKS['number']
+    is_string = _TYPE_CHECKS['string']
+    is_array = _TYPE_CHECKS['array']
+    identity = lambda value: value
+
+    if 'minimum' in schema:
+        bound('minimum', is_number, identity, lambda v, limit: v < limit, 'must be >=')
+    if 'maximum' in schema:
+        bound('maximum', is_number, identity, lambda v, limit: v > limit, 'must be <=')
+    if 'exclusiveMinimum' in schema:
+        bound('exclusiveMinimum', is_number, identity, lambda v, limit: v <= limit, 'must be >')
+    if 'exclusiveMaximum' in schema:
+        bound('exclusiveMaximum', is_number, identity, lambda v, limit: v >= limit, 'must be <')
+    if 'minLength' in schema:
+        bound('minLength', is_string, len, lambda v, limit: v < limit, 'length must be >=')
+    if 'maxLength' in schema:
+        bound('maxLength', is_string, len, lambda v, limit: v > limit, 'length must be <=')
+    if 'minItems' in schema:
+        bound('minItems', is_array, len, lambda v, limit: v < limit, 'item count must be >=')
+    if 'maxItems' in schema:
+        bound('maxItems', is_array, len, lambda v, limit: v > limit, 'item count must be <=')
+
+    if 'pattern' in schema:
+        pattern = re.compile(schema['pattern'])
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not pattern.search(value):
+                errors.append(f"{path or 'arguments'}: does not match {schema['pattern']!r}")
+        checks.append(check_pattern)
+
+    return checks
@@ -0,0 +1,369 @@
+# mcp_transport.py
+"""
+JSON-RPC 2.0 transports for MCP servers, alongside MCPClient's REST calls.
+StdioTransport talks newline-delimited JSON to a server subprocess;
+SSETransport POSTs messages to an HTTP server and reads every reply from
+one Server-Sent Events stream. Both keep any number of requests in flight
+on the one channel (replies are matched by id), and tool output a server
+streams as progress notifications is handed to the caller as it arrives.
+"""
+import itertools
+import json
+import queue
+import subprocess
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urljoin, urlparse
+
+import http_client
+
+PROTOCOL_VERSION = '2025-06-18'
+DEFAULT_CALL_TIMEOUT = 30.0
+
+# JSON-RPC 2.0 error codes
+JSONRPC_PARSE_ERROR = -32700
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_METHOD_NOT_FOUND = -32601
+JSONRPC_INVALID_PARAMS = -32602
+
+LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+class JSONRPCError(Exception):
+    """Error reply from a JSON-RPC server"""
+
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+def tool_result(output: Dict) -> Dict:
+    """Wrap a tool's output dict as an MCP CallToolResult"""
+    return {
+        'content': [{'type': 'text', 'text': json.dumps(output)}],
+        'structuredContent': output,
+        'isError': isinstance(output, dict) and 'error' in output
+    }
+
+
+def unwrap_tool_result(result: Dict) -> Dict:
+    """Turn a CallToolResult back into the plain output dict the REST endpoints return"""
+    if not isinstance(result, dict) or 'content' not in result:
+        return result
+    if isinstance(result.get('structuredContent'), dict):
+        return result['structuredContent']
+    text = ''.join(part.get('text', '') for part in result['content'] if part.get('type') == 'text')
+    try:
+        output = json.loads(text)
+        if isinstance(output, dict):
+            return output
+    except ValueError:
+        pass
+    return {'error': text} if result.get('isError') else {'content': text}
+
+
+class JSONRPCChannel:
+    """
+    Request/reply matching shared by the transports. Subclasses implement
+    _send(message) and feed every message they receive to _dispatch().
+    """
+
+    def __init__(self, timeout: float = DEFAULT_CALL_TIMEOUT):
+        self.timeout = timeout
+        self.server_info = {}
+        # Called with every notification other than progress
+        self.on_notification: Optional[Callable[[Dict], None]] = None
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._progress = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, params: Dict = None,
+                on_progress: Callable[[Dict], None] = None) -> Future:
+        """Send a request without waiting; the future resolves to its result"""
+        request_id = next(self._ids)
+        future = Future()
+        params = dict(params or {})
+        if on_progress is not None:
+            params['_meta'] = {**params.get('_meta', {}), 'progressToken': request_id}
+
+        with self._lock:
+            if self.closed:
+                future.set_exception(ConnectionError('Channel closed'))
+                return future
+            self._pending[request_id] = future
+            if on_progress is not None:
+                self._progress[request_id] = on_progress
+        future.add_done_callback(lambda _: self._forget(request_id))
+
+        try:
+            self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+        except Exception as e:
+            self._settle(request_id, exception=e)
+        return future
+
+    def call(self, method: str, params: Dict = None, timeout: float = None,
+             on_progress: Callable[[Dict], None] = None):
+        """Send a request and wait for its result; raises JSONRPCError or TimeoutError"""
+        future = self.request(method, params, on_progress)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"{method} timed out")
+
+    def notify(self, method: str, params: Dict = None):
+        message = {'jsonrpc': '2.0', 'method': method}
+        if params is not None:
+            message['params'] = params
+        self._send(message)
+
+    def initialize(self, client_name: str = 'optimus_prime') -> Dict:
+        """MCP handshake: initialize, then the initialized notification"""
+        self.server_info = self.call('initialize', {
+            'protocolVersion': PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': {'name': client_name, 'version': '1.0'}
+        })
+        self.notify('notifications/initialized')
+        return self.server_info
+
+    def list_tools(self) -> List[Dict]:
+        return self.call('tools/list').get('tools', [])
+
+    def call_tool(self, tool_name: str, arguments: Dict, timeout: float = None,
+                  on_chunk: Callable[[str], None] = None) -> Dict:
+        """
+        Call a tool and return its output dict; failures come back as
+        {'error': ...}. on_chunk receives streamed output as it arrives.
+        """
+        on_progress = None
+        if on_chunk is not None:
+            on_progress = lambda params: on_chunk(params.get('message', ''))
+        try:
+            result = self.call('tools/call', {'name': tool_name, 'arguments': arguments},
+                               timeout=timeout, on_progress=on_progress)
+            return unwrap_tool_result(result)
+        except Exception as e:
+            return {'error': f'{tool_name} failed: {e}'}
+
+    def stream_tool(self, tool_name: str, arguments: Dict, timeout: float = None) -> Iterator[str]:
+        """
+        Yield a tool's output text chunk by chunk as the server streams it.
+        Servers that don't stream yield the whole output as one chunk.
+        """
+        chunks = queue.Queue()
+        done = object()
+        future = self.request('tools/call', {'name': tool_name, 'arguments': arguments},
+                              on_progress=lambda params: chunks.put(params.get('message', '')))
+        future.add_done_callback(lambda _: chunks.put(done))
+
+        streamed = False
+        while True:
+            try:
+                chunk = chunks.get(timeout=timeout or self.timeout)
+            except queue.Empty:
+                future.cancel()
+                raise TimeoutError(f"{tool_name} timed out")
+            if chunk is done:
+                break
+            streamed = True
+            yield chunk
+
+        result = future.result()
+        if not streamed:
+            yield ''.join(part.get('text', '') for part in result.get('content', [])
+                          if part.get('type') == 'text')
+
+    def close(self):
+        self._fail_all(ConnectionError('Channel closed'))
+
+    def _send(self, message):
+        raise NotImplementedError
+
+    def _dispatch(self, message):
+        """Route a received message (or batch) to its future or callback"""
+        if isinstance(message, list):
+            for item in message:
+                self._dispatch(item)
+            return
+        if not isinstance(message, dict):
+            return
+
+        if 'method' not in message:
+            request_id = message.get('id')
+            error = message.get('error')
+            if error is not None:
+                self._settle(request_id, exception=JSONRPCError(
+                    error.get('code', 0), error.get('message', 'JSON-RPC error'), error.get('data')))
+            else:
+                self._settle(request_id, result=message.get('result'))
+        elif message['method'] == 'notifications/progress':
+            params = message.get('params') or {}
+            callback = self._progress.get(params.get('progressToken'))
+            if callback is not None:
+                try:
+                    callback(params)
+                except Exception as e:
+                    print(f"MCP progress handler error: {e}")
+        elif self.on_notification is not None:
+            self.on_notification(message)
+
+    def _settle(self, request_id, result=None, exception: Exception = None):
+        with self._lock:
+            future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except Exception:
+            pass  # Cancelled by a caller that timed out
+
+    def _forget(self, request_id):
+        with self._lock:
+            self._pending.pop(request_id, None)
+            self._progress.pop(request_id, None)
+
+    def _fail_all(self, exception: Exception):
+        with self._lock:
+            self.closed = True
+            pending = list(self._pending)
+        for request_id in pending:
+            self._settle(request_id, exception=exception)
+
+
+class StdioTransport(JSONRPCChannel):
+    """JSON-RPC over the stdin/stdout of a server subprocess, one message per line"""
+
+    def __init__(self, command: Sequence[str], timeout: float = DEFAULT_CALL_TIMEOUT):
+        super().__init__(timeout)
+        self.command = list(command)
+        self._write_lock = threading.Lock()
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _send(self, message):
+        line = json.dumps(message, separators=(',', ':')) + '\n'
+        with self._write_lock:
+            self._process.stdin.write(line)
+            self._process.stdin.flush()
+
+    def _read_loop(self):
+        try:
+            for line in self._process.stdout:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    print(f"MCP stdio: ignoring non-JSON output: {line.strip()[:80]}")
+                    continue
+                self._dispatch(message)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._fail_all(ConnectionError('MCP server process exited'))
+
+    def close(self):
+        """Close the server's stdin and wait for it to exit"""
+        super().close()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._process.terminate()
+            self._process.wait()
+
+
+class SSETransport(JSONRPCChannel):
+    """
+    MCP's HTTP+SSE transport: GET /sse opens an event stream whose first
+    'endpoint' event names the URL to POST messages to; replies and
+    notifications come back as 'message' events on the stream.
+    """
+
+    def __init__(self, server_url: str, timeout: float = DEFAULT_CALL_TIMEOUT,
+                 sse_path: str = '/sse', connect_timeout: float = http_client.DEFAULT_TIMEOUT[0]):
+        super().__init__(timeout)
+        self.server_url = server_url
+        self.connect_timeout = connect_timeout
+        self.endpoint = None
+        self._endpoint_ready = threading.Event()
+        self._http = http_client.new_session(trust_env=urlparse(server_url).hostname not in LOOPBACK_HOSTS)
+
+        # No read timeout: the stream stays open between events
+        self._stream = self._http.get(urljoin(server_url, sse_path), stream=True,
+                                      timeout=(connect_timeout, None),
+                                      headers={'Accept': 'text/event-stream'})
+        self._stream.raise_for_status()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        if not self._endpoint_ready.wait(connect_timeout):
+            self.close()
+            raise ConnectionError(f"No endpoint event from {server_url}{sse_path}")
+
+    def _send(self, message):
+        if self.endpoint is None:
+            raise ConnectionError('SSE stream not connected')
+        response = http_client.request('POST', self.endpoint, retries=0,
+                                       timeout=(self.connect_timeout, self.timeout),
+                                       session=self._http, json=message)
+        response.close()
+        if response.status_code not in (200, 202):
+            raise ConnectionError(f"MCP server rejected message: HTTP {response.status_code}")
+
+    def _read_loop(self):
+        event, data = 'message', []
+        try:
+            # chunk_size=None hands each chunk over as soon as it arrives
+            for raw_line in self._stream.iter_lines(chunk_size=None):
+                line = raw_line.decode('utf-8')
+                if not line:
+                    if data:
+                        self._handle_event(event, '\n'.join(data))
+                    event, data = 'message', []
+                elif line.startswith(':'):
+                    continue  # keepalive comment
+                else:
+                    field, _, value = line.partition(':')
+                    value = value[1:] if value.startswith(' ') else value
+                    if field == 'event':
+                        event = value
+                    elif field == 'data':
+                        data.append(value)
+        except Exception as e:
+            if not self.closed:
+                print(f"MCP SSE stream error: {e}")
+        finally:
+            self._fail_all(ConnectionError('MCP SSE stream closed'))
+
+    def _handle_event(self, event: str, data: str):
+        if event == 'endpoint':
+            self.endpoint = urljoin(self.server_url, data)
+            self._endpoint_ready.set()
+        elif event == 'message':
+            try:
+                self._dispatch(json.loads(data))
+            except ValueError:
+                print(f"MCP SSE: ignoring malformed message: {data[:80]}")
+
+    def close(self):
+        super().close()
+        self._stream.close()
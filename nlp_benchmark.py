@@ -0,0 +1,130 @@
+# nlp_benchmark.py
+"""
+Microbenchmark for NLPProcessor intent classification.
+Measures classifications per second of the compiled grammar against the
+old one-re.search-per-pattern loop over a corpus of utterances.
+
+Usage: python nlp_benchmark.py [utterances.txt] [--rounds N]
+The corpus file holds one recorded utterance per line.
+"""
+import re
+import sys
+import time
+
+from nlp_processor import COVERAGE_WEIGHT, KEYWORD_BASE_SCORE, PATTERN_BASE_SCORE, NLPProcessor
+
+SAMPLE_UTTERANCES = [
+    "what time is it",
+    "open chrome",
+    "can you open visual studio code",
+    "please close notepad",
+    "search for python tutorials",
+    "who is alan turing",
+    "tell me about black holes",
+    "what's the date today",
+    "how's the weather",
+    "what's the weather like in lahore",
+    "create a file called notes",
+    "delete old report",
+    "play music",
+    "pause music",
+    "next song",
+    "previous track",
+    "volume up",
+    "brightness down",
+    "lock computer",
+    "open chrome and play music",
+    "launch spotify and then search for lofi beats",
+    "remind me to drink water",
+    "thank you that was great",
+    "hmm I am not sure",
+    "read my emails",
+    "restart the pc",
+    "look up the nearest pharmacy",
+    "find file budget",
+    "current time please",
+    "shutdown system",
+]
+
+
+def sequential_understand(processor, query):
+    """
+    Reference classifier: one re.search per pattern, the first hit per
+    intent scored by coverage like match_intents; the best score wins and
+    ties go to the earlier intent
+    """
+    query = query.lower().strip()
+    best = (0.0, 'unknown', None, [])
+    matched = set()
+    for cmd_type, patterns in processor.command_patterns.items():
+        for pattern in patterns:
+            match = re.search(pattern, query, re.IGNORECASE)
+            if match:
+                matched.add(cmd_type)
+                coverage = (match.end() - match.start()) / max(len(query), 1)
+                score = round(PATTERN_BASE_SCORE + COVERAGE_WEIGHT * coverage, 3)
+                if score > best[0]:
+                    action = match.group(1) if match.groups() else None
+                    parameters = [g for g in match.groups()[1:] if g]
+                    best = (score, cmd_type, action, parameters)
+                break
+    for cmd_type, words in processor.command_keywords.items():
+        if cmd_type in matched:
+            continue
+        for word in words:
+            if word in query:
+                score = round(KEYWORD_BASE_SCORE + COVERAGE_WEIGHT * len(word) / len(query), 3)
+                if score > best[0]:
+                    best = (score, cmd_type, None, [])
+                break
+    return best[1:]
+
+
+def compiled_understand(processor, query):
+    result = processor.understand_command(query)
+    return result['type'], result['action'], result['parameters']
+
+
+def measure(classify, processor, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for utterance in corpus:
+            classify(processor, utterance)
+    elapsed = time.perf_counter() - started
+    return (rounds * len(corpus)) / elapsed
+
+
+def main(argv):
+    rounds = 200
+    corpus = SAMPLE_UTTERANCES
+    args = list(argv)
+    if '--rounds' in args:
+        index = args.index('--rounds')
+        rounds = int(args[index + 1])
+        del args[index:index + 2]
+    if args:
+        with open(args[0], 'r', encoding='utf-8') as f:
+            corpus = [line.strip() for line in f if line.strip()]
+
+    processor = NLPProcessor()
+
+    mismatches = [
+        utterance for utterance in corpus
+        if sequential_understand(processor, utterance) != compiled_understand(processor, utterance)
+    ]
+
+    sequential_rate = measure(sequential_understand, processor, corpus, rounds)
+    compiled_rate = measure(compiled_understand, processor, corpus, rounds)
+
+    print(f"Corpus: {len(corpus)} utterances x {rounds} rounds")
+    print(f"Sequential re.search loop: {sequential_rate:,.0f} classifications/sec")
+    print(f"Compiled grammar:          {compiled_rate:,.0f} classifications/sec")
+    print(f"Speedup: {compiled_rate / sequential_rate:.2f}x")
+    if mismatches:
+        print(f"{len(mismatches)} utterances classified differently:")
+        for utterance in mismatches:
+            print(f"  {utterance}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
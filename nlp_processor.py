@@ -1,15 +1,45 @@
 import re
 import os
+import json
+import heapq
+import itertools
+from collections import deque
+from itertools import islice
 from datetime import datetime
 import google.generativeai as genai
+from task_executor import TaskExecutor
+from intent_cache import IntentCache
+from sentiment import SentimentAnalyzer
+from response_cache import LRUCache
+
+_WORD_RE = re.compile(r'\w+')
+
+# Intent scores: a base for the kind of match plus a share for how much of the query it covers
+PATTERN_BASE_SCORE = 0.8
+KEYWORD_BASE_SCORE = 0.3
+COVERAGE_WEIGHT = 0.2
 
 class NLPProcessor:
-    def __init__(self):
-        """Initialize NLP Processor with enhanced understanding capabilities"""
-        self.conversation_history = []
-        self.pending_tasks = []
+    def __init__(self, history_size=200, history_log=None):
+        """
+        Initialize NLP Processor with enhanced understanding capabilities.
+        Only the last `history_size` turns are kept in memory; older turns
+        are appended to `history_log` (a JSON-lines file) when it is set.
+        """
+        self.conversation_history = deque(maxlen=history_size)
+        self.history_log = history_log
+        self.pending_tasks = []  # heap of (priority, sequence, task)
+        self._task_sequence = itertools.count()
         self.user_context = {}
         
+        # Cached Gemini intent results; slow calls fall back to the local result
+        self.intent_cache = IntentCache()
+        self.ai_latency_budget = 3.0
+        
+        # Speculative mode starts the Gemini request as soon as a query arrives
+        self.speculative_ai = False
+        self.speculative_deadline = 0.3
+        
         # Initialize Gemini AI
         try:
             api_key = os.getenv("GEMINI_API_KEY")
@@ -76,33 +106,72 @@ class NLPProcessor:
             ]
         }
         
-        # Positive and negative words for sentiment analysis
-        self.positive_words = [
-            'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
-            'happy', 'pleased', 'satisfied', 'love', 'like', 'best', 'perfect',
-            'awesome', 'brilliant', 'superb', 'outstanding', 'nice', 'beautiful'
-        ]
+        # Keywords used when no command pattern matches
+        self.command_keywords = {
+            'open': ['open', 'launch', 'start', 'run'],
+            'close': ['close', 'exit', 'quit', 'shutdown'],
+            'search': ['search', 'find', 'google', 'look'],
+            'time': ['time', 'clock'],
+            'date': ['date', 'day', 'today'],
+            'weather': ['weather', 'temperature', 'forecast'],
+            'file': ['file', 'document', 'folder'],
+            'music': ['music', 'song', 'play', 'audio'],
+            'system': ['volume', 'brightness', 'restart', 'shutdown']
+        }
         
-        self.negative_words = [
-            'bad', 'terrible', 'awful', 'horrible', 'poor', 'worst', 'hate',
-            'dislike', 'disappointed', 'angry', 'sad', 'frustrated', 'annoyed',
-            'upset', 'unhappy', 'useless', 'boring', 'dull', 'slow'
-        ]
+        # Compiled intent grammar, rebuilt whenever the patterns change
+        self._grammar_source = None
+        # Deterministic results of process_command keyed by normalized utterance
+        self.command_cache = LRUCache(maxsize=512)
+        self._compile_grammar()
+        
+        # Positive and negative lexicons for sentiment analysis
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.positive_words = self.sentiment_analyzer.positive_words
+        self.negative_words = self.sentiment_analyzer.negative_words
         
-    def process_command(self, query):
+    def process_command(self, query, speculative=None):
         """
         Main processing function that handles all NLP features
         Returns: dict with command type, action, parameters, sentiment
+        In speculative mode the AI request runs in the background while the
+        local stages run; its answer is only used if it is ready in time.
         """
         if not query:
             return None
         
+        if speculative is None:
+            speculative = self.speculative_ai
+        ai_future = self.start_ai_understanding(query) if speculative else None
+        
         # Store in conversation history
-        self.conversation_history.append({
-            'query': query,
-            'timestamp': datetime.now()
-        })
+        self._record_turn(query)
+        
+        # Repeated utterances reuse the deterministic part of the result.
+        # The analysis runs on the normalized key itself, so every query
+        # sharing the key gets the same parameters.
+        self._ensure_grammar()
+        cache_key = ' '.join(query.lower().split())
+        cached = self.command_cache.get(cache_key)
+        if cached is not None:
+            command_info = self._copy_command_info(cached)
+        else:
+            command_info = self._analyze_locally(cache_key)
+            self.command_cache.set(cache_key, self._copy_command_info(command_info))
+        command_info['original_query'] = query.lower().strip()
         
+        # Use AI for complex understanding if enabled
+        if ai_future is not None:
+            self._apply_speculative_ai(command_info, ai_future)
+        elif self.ai_enabled and command_info['confidence'] < 0.7:
+            ai_understanding = self.ai_understand(query)
+            if ai_understanding:
+                command_info['ai_suggestion'] = ai_understanding
+        
+        return command_info
+    
+    def _analyze_locally(self, query):
+        """Run the deterministic stages: sentiment, patterns, ambiguity and steps"""
         # Perform sentiment analysis
         sentiment = self.analyze_sentiment(query)
         
@@ -123,14 +192,210 @@ class NLPProcessor:
         # Add sentiment to command info
         command_info['sentiment'] = sentiment
         
-        # Use AI for complex understanding if enabled
-        if self.ai_enabled and command_info['confidence'] < 0.7:
-            ai_understanding = self.ai_understand(query)
-            if ai_understanding:
-                command_info['ai_suggestion'] = ai_understanding
-        
         return command_info
     
+    @staticmethod
+    def _copy_command_info(command_info):
+        """Copy a command result deep enough that callers can't alter the cache"""
+        copied = dict(command_info)
+        copied['parameters'] = list(command_info['parameters'])
+        copied['candidates'] = list(command_info.get('candidates', []))
+        copied['sentiment'] = dict(command_info['sentiment'])
+        if 'steps' in command_info:
+            copied['steps'] = [
+                dict(step, parameters=list(step['parameters']), depends_on=list(step['depends_on']))
+                for step in command_info['steps']
+            ]
+        return copied
+    
+    def get_cache_stats(self):
+        """Hit-rate statistics for the utterance cache"""
+        return self.command_cache.get_stats()
+    
+    def start_ai_understanding(self, query):
+        """Start the Gemini lookup for a query in the background and return its Future"""
+        if not self.ai_enabled:
+            return None
+        return self.intent_cache.submit(query, lambda: self._ai_understand_uncached(query))
+    
+    def _apply_speculative_ai(self, command_info, ai_future):
+        """
+        Attach a speculative AI result if it is ready. Confident local
+        results never wait and are never changed; uncertain ones wait up to
+        speculative_deadline. An uncertain result is replaced only when the
+        AI's reading ("ACTION TARGET") parses as a full command with the
+        local grammar, and then type, action and parameters are replaced
+        together from that parse.
+        """
+        uncertain = command_info['confidence'] < 0.7
+        wait = self.speculative_deadline if uncertain else 0
+        try:
+            ai_understanding = ai_future.result(timeout=wait)
+        except Exception:
+            # Not ready in time (or failed); the result is still cached when it lands
+            return
+        
+        if not ai_understanding:
+            return
+        
+        command_info['ai_suggestion'] = ai_understanding
+        if not uncertain:
+            return
+        
+        reading = ' '.join(
+            part for part in (ai_understanding.get('action'), ai_understanding.get('target'))
+            if part and part.lower() != 'none'
+        )
+        corrected = self.understand_command(reading) if reading else None
+        if corrected is None or corrected['confidence'] < PATTERN_BASE_SCORE:
+            return
+        
+        command_info['type'] = corrected['type']
+        command_info['action'] = corrected['action']
+        command_info['parameters'] = corrected['parameters']
+        command_info['confidence'] = min(corrected['confidence'], ai_understanding.get('ai_confidence', 0))
+        command_info['ambiguous'] = False
+        command_info.pop('clarification_needed', None)
+        command_info['corrected_by_ai'] = True
+    
+    def _grammar_fingerprint(self):
+        """Snapshot of the pattern tables the grammar was compiled from"""
+        return (
+            tuple(self.command_patterns),
+            tuple(map(tuple, self.command_patterns.values())),
+            tuple(self.command_keywords),
+            tuple(map(tuple, self.command_keywords.values()))
+        )
+    
+    @staticmethod
+    def _pattern_triggers(pattern):
+        r"""
+        Return the literal words one of which must start the text a pattern
+        matches, e.g. {'open', 'launch'} for r'\b(open|launch)\s+(.+)'.
+        Returns None when the pattern has no simple literal anchor.
+        """
+        if not pattern.startswith(r'\b'):
+            return None
+        
+        rest = pattern[2:]
+        if rest.startswith('('):
+            close = rest.find(')')
+            body = rest[1:close]
+            if close < 0 or body.startswith('?') or '(' in body:
+                return None
+            alternatives = body.split('|')
+        else:
+            alternatives = [rest]
+        
+        triggers = set()
+        for alternative in alternatives:
+            literal = re.match(r'[a-z0-9]+', alternative.lower())
+            # A quantifier right after the literal makes its last character optional
+            if not literal or alternative[literal.end():literal.end() + 1] in ('?', '*', '{'):
+                return None
+            triggers.add(literal.group())
+        return triggers
+    
+    def _compile_grammar(self):
+        """
+        Precompile the intent grammar.
+        Every pattern is compiled once and indexed by the literal words that
+        can start a match, so classification tokenizes the query once and
+        only runs the patterns whose trigger words actually occur in it.
+        """
+        self._compiled_patterns = []  # (command type, compiled pattern)
+        self._trigger_index = {}
+        self._untriggered = []
+        
+        for cmd_type, patterns in self.command_patterns.items():
+            for pattern in patterns:
+                slot = len(self._compiled_patterns)
+                self._compiled_patterns.append((cmd_type, re.compile(pattern, re.IGNORECASE)))
+                
+                triggers = self._pattern_triggers(pattern)
+                if triggers is None:
+                    self._untriggered.append(slot)
+                    continue
+                for trigger in triggers:
+                    self._trigger_index.setdefault(trigger, []).append(slot)
+        
+        self._trigger_lengths = sorted(set(len(trigger) for trigger in self._trigger_index))
+        self._keyword_table = [
+            (cmd_type, tuple(words)) for cmd_type, words in self.command_keywords.items()
+        ]
+        self._grammar_source = self._grammar_fingerprint()
+        # Cached results were produced by the old grammar
+        self.command_cache.clear()
+    
+    def _ensure_grammar(self):
+        """Recompile the grammar if command_patterns or command_keywords changed"""
+        if self._grammar_fingerprint() != self._grammar_source:
+            self._compile_grammar()
+    
+    def match_intents(self, query):
+        """
+        Classify a query with the precompiled grammar.
+        Returns every candidate intent, best first, each with its score,
+        action, parameters and the fraction of the query it covers.
+        Pattern hits score PATTERN_BASE_SCORE and keyword hits
+        KEYWORD_BASE_SCORE, plus COVERAGE_WEIGHT times the coverage; ties
+        keep the order of command_patterns.
+        """
+        self._ensure_grammar()
+        query = query.lower().strip()
+        
+        # Collect the patterns whose trigger word starts some word of the query
+        slots = set(self._untriggered)
+        index = self._trigger_index
+        for word in _WORD_RE.findall(query):
+            for length in self._trigger_lengths:
+                if length > len(word):
+                    break
+                hit = index.get(word[:length])
+                if hit:
+                    slots.update(hit)
+        
+        candidates = []
+        seen = set()
+        for slot in sorted(slots):
+            cmd_type, compiled = self._compiled_patterns[slot]
+            if cmd_type in seen:
+                continue
+            match = compiled.search(query)
+            if not match:
+                continue
+            seen.add(cmd_type)
+            
+            groups = match.groups()
+            coverage = (match.end() - match.start()) / max(len(query), 1)
+            candidates.append({
+                'type': cmd_type,
+                'score': round(PATTERN_BASE_SCORE + COVERAGE_WEIGHT * coverage, 3),
+                'action': groups[0] if groups else None,
+                'parameters': [g for g in groups[1:] if g],
+                'coverage': coverage
+            })
+        
+        for cmd_type, words in self._keyword_table:
+            if cmd_type in seen:
+                continue
+            for word in words:
+                if word in query:
+                    seen.add(cmd_type)
+                    coverage = len(word) / len(query)
+                    candidates.append({
+                        'type': cmd_type,
+                        'score': round(KEYWORD_BASE_SCORE + COVERAGE_WEIGHT * coverage, 3),
+                        'action': None,
+                        'parameters': [],
+                        'coverage': coverage
+                    })
+                    break
+        
+        # Stable sort: equal scores stay in priority order
+        candidates.sort(key=lambda candidate: -candidate['score'])
+        return candidates
+    
     def understand_command(self, query):
         """Enhanced command understanding with pattern matching"""
         query = query.lower().strip()
@@ -144,73 +409,27 @@ class NLPProcessor:
             'ambiguous': False
         }
         
-        # Check each command pattern
-        for cmd_type, patterns in self.command_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, query, re.IGNORECASE)
-                if match:
-                    result['type'] = cmd_type
-                    result['confidence'] = 0.9
-                    
-                    # Extract parameters based on groups
-                    if len(match.groups()) > 0:
-                        result['action'] = match.group(1)
-                        if len(match.groups()) > 1:
-                            result['parameters'] = [g for g in match.groups()[1:] if g]
-                    
-                    return result
-        
-        # If no pattern matched, try keyword matching
-        keywords = {
-            'open': ['open', 'launch', 'start', 'run'],
-            'close': ['close', 'exit', 'quit', 'shutdown'],
-            'search': ['search', 'find', 'google', 'look'],
-            'time': ['time', 'clock'],
-            'date': ['date', 'day', 'today'],
-            'weather': ['weather', 'temperature', 'forecast'],
-            'file': ['file', 'document', 'folder'],
-            'music': ['music', 'song', 'play', 'audio'],
-            'system': ['volume', 'brightness', 'restart', 'shutdown']
-        }
+        candidates = self.match_intents(query)
+        result['candidates'] = [(c['type'], c['score']) for c in candidates]
         
-        for cmd_type, words in keywords.items():
-            if any(word in query for word in words):
-                result['type'] = cmd_type
-                result['confidence'] = 0.5
-                result['ambiguous'] = True
-                break
+        if candidates:
+            best = candidates[0]
+            result['type'] = best['type']
+            result['confidence'] = best['score']
+            result['action'] = best['action']
+            result['parameters'] = best['parameters']
+            # Only keyword hits means we guessed the intent
+            result['ambiguous'] = best['score'] < PATTERN_BASE_SCORE
         
         return result
     
     def analyze_sentiment(self, text):
         """Analyze sentiment of user input"""
-        text_lower = text.lower()
-        words = text_lower.split()
-        
-        positive_count = sum(1 for word in words if word in self.positive_words)
-        negative_count = sum(1 for word in words if word in self.negative_words)
-        
-        # Calculate sentiment score
-        if positive_count > negative_count:
-            sentiment_score = positive_count / len(words) if words else 0
-            return {
-                'type': 'positive',
-                'score': min(sentiment_score * 10, 1.0),
-                'confidence': 0.7 + (positive_count * 0.1)
-            }
-        elif negative_count > positive_count:
-            sentiment_score = negative_count / len(words) if words else 0
-            return {
-                'type': 'negative',
-                'score': min(sentiment_score * 10, 1.0),
-                'confidence': 0.7 + (negative_count * 0.1)
-            }
-        else:
-            return {
-                'type': 'neutral',
-                'score': 0.5,
-                'confidence': 0.6
-            }
+        return self.sentiment_analyzer.analyze(text)
+    
+    def analyze_sentiment_batch(self, texts):
+        """Analyze sentiment of many texts in one vectorized pass"""
+        return self.sentiment_analyzer.analyze_batch(texts)
     
     def is_multistep_task(self, query):
         """Check if query contains multiple tasks"""
@@ -230,29 +449,54 @@ class NLPProcessor:
         return verb_count > 1
     
     def break_into_steps(self, query):
-        """Break multi-step query into individual steps"""
+        """
+        Break multi-step query into individual steps.
+        Each step lists the steps it must wait for in 'depends_on':
+        ordering words ("then", "after that") chain the steps, while
+        "also" and plain "and" leave them free to run concurrently.
+        """
         # Split by common separators
         separators = [
             'and then', 'after that', 'then', 'next', 'finally',
             'first', 'second', 'third', 'also', ', and'
         ]
+        concurrent_separators = ('also', ', and')
         
         steps = [query]
+        sequential = True
         for separator in separators:
             if separator in query.lower():
                 parts = re.split(separator, query, flags=re.IGNORECASE)
                 steps = [part.strip() for part in parts if part.strip()]
+                sequential = separator not in concurrent_separators
                 break
+        else:
+            # "open chrome and play music": split on "and" only if every part is a full command
+            parts = [part.strip() for part in re.split(r'\band\b', query, flags=re.IGNORECASE)]
+            if len(parts) > 1 and all(part and self.understand_command(part)['confidence'] >= PATTERN_BASE_SCORE
+                                      for part in parts):
+                steps = parts
+                sequential = False
         
         # Process each step
         processed_steps = []
         for i, step in enumerate(steps):
             step_info = self.understand_command(step)
             step_info['step_number'] = i + 1
+            step_info['depends_on'] = [i] if sequential and i > 0 else []
             processed_steps.append(step_info)
         
         return processed_steps
     
+    def execute_steps(self, steps, handler, on_event=None, max_workers=4, timeout=None):
+        """
+        Run the steps from break_into_steps on a worker pool, respecting
+        their dependencies. `handler(step)` executes one step; `on_event`
+        receives completion events. Returns step_number -> outcome.
+        """
+        executor = TaskExecutor(handler, max_workers=max_workers, on_event=on_event)
+        return executor.run(steps, timeout=timeout)
+    
     def resolve_ambiguity(self, query, command_info):
         """Provide clarification for ambiguous commands"""
         clarifications = {
@@ -270,11 +514,25 @@ class NLPProcessor:
         
         return None
     
-    def ai_understand(self, query):
-        """Use Gemini AI for complex command understanding"""
+    def ai_understand(self, query, timeout=None):
+        """
+        Use Gemini AI for complex command understanding.
+        Results are cached, identical concurrent queries share one request,
+        and None is returned if no answer arrives within the latency budget.
+        """
         if not self.ai_enabled:
             return None
         
+        if timeout is None:
+            timeout = self.ai_latency_budget
+        return self.intent_cache.get_or_compute(
+            query,
+            lambda: self._ai_understand_uncached(query),
+            timeout=timeout
+        )
+    
+    def _ai_understand_uncached(self, query):
+        """Ask Gemini for the intent of a query"""
         try:
             prompt = f"""
             Analyze this voice command and extract the intent:
@@ -306,18 +564,70 @@ class NLPProcessor:
         
         return None
     
-    def get_conversation_context(self):
+    def _record_turn(self, query):
+        """Add a turn to the history ring buffer, spilling the evicted turn to disk"""
+        history = self.conversation_history
+        if history.maxlen is not None and len(history) == history.maxlen and self.history_log:
+            self._spill_turn(history[0])
+        
+        history.append({
+            'query': query,
+            'timestamp': datetime.now()
+        })
+    
+    def _spill_turn(self, turn):
+        """Append an old turn to the on-disk history log"""
+        try:
+            with open(self.history_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'query': turn['query'],
+                    'timestamp': turn['timestamp'].isoformat()
+                }) + '\n')
+        except Exception as e:
+            print(f"[History Log Error]: {e}")
+    
+    def get_conversation_context(self, turns=5):
         """Return recent conversation history for context"""
-        return self.conversation_history[-5:] if self.conversation_history else []
+        recent = list(islice(reversed(self.conversation_history), turns))
+        recent.reverse()
+        return recent
+    
+    def get_history_between(self, start, end=None):
+        """
+        Return turns with start <= timestamp <= end, oldest first.
+        Turns that were spilled to the history log are included.
+        """
+        end = end or datetime.now()
+        turns = []
+        
+        in_memory = self.conversation_history
+        oldest_in_memory = in_memory[0]['timestamp'] if in_memory else None
+        
+        if self.history_log and os.path.exists(self.history_log) and \
+                (oldest_in_memory is None or start < oldest_in_memory):
+            try:
+                with open(self.history_log, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        record = json.loads(line)
+                        timestamp = datetime.fromisoformat(record['timestamp'])
+                        if timestamp > end:
+                            break
+                        if timestamp >= start:
+                            turns.append({'query': record['query'], 'timestamp': timestamp})
+            except Exception as e:
+                print(f"[History Log Error]: {e}")
+        
+        turns.extend(turn for turn in in_memory if start <= turn['timestamp'] <= end)
+        return turns
     
-    def add_task_to_queue(self, task):
-        """Add multi-step task to pending queue"""
-        self.pending_tasks.append(task)
+    def add_task_to_queue(self, task, priority=5):
+        """Add multi-step task to pending queue (lower priority numbers run first)"""
+        heapq.heappush(self.pending_tasks, (priority, next(self._task_sequence), task))
     
     def get_next_task(self):
         """Get next task from queue"""
         if self.pending_tasks:
-            return self.pending_tasks.pop(0)
+            return heapq.heappop(self.pending_tasks)[2]
         return None
     
     def update_user_context(self, key, value):
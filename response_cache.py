@@ -0,0 +1,224 @@
+# response_cache.py
+"""
+Response caching for remote API calls.
+LRUCache is a small thread-safe in-memory LRU map. ResponseCache layers
+per-endpoint TTLs, an optional SQLite back store and stale-while-revalidate
+refreshes on top of it.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss statistics"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it as recently used"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value"""
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        """Drop every entry and reset statistics"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def keys(self):
+        """Return a snapshot of the cached keys, oldest first"""
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self) -> Dict:
+        """Return size and hit-rate statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class ResponseCache:
+    """
+    TTL cache for API responses, keyed by endpoint and request key.
+    Fresh entries are returned directly. Entries past their TTL but within
+    the stale window are returned immediately while a background refresh
+    runs. Values must be JSON-serialisable when a SQLite path is given.
+    """
+
+    def __init__(self, ttls: Dict[str, float], maxsize: int = 256,
+                 db_path: Optional[str] = None, stale_factor: float = 1.0):
+        self.ttls = ttls
+        self.stale_factor = stale_factor
+        self.memory = LRUCache(maxsize)
+        self.db_path = db_path
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        """Open the SQLite back store, disabling it on failure"""
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "endpoint TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, PRIMARY KEY (endpoint, key))"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"Response cache database error: {e}")
+            self._db = None
+
+    def get_or_fetch(self, endpoint: str, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached response for (endpoint, key), calling fetch on a
+        miss. Exceptions raised by fetch propagate and nothing is cached.
+        """
+        ttl = self.ttls.get(endpoint, 0)
+        entry = self.memory.get((endpoint, key))
+        if entry is None:
+            entry = self._load(endpoint, key)
+            if entry is not None:
+                self.memory.set((endpoint, key), entry)
+
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                return value
+            if age < ttl * (1 + self.stale_factor):
+                self._refresh_in_background(endpoint, key, fetch)
+                return value
+
+        return self._fetch_and_store(endpoint, key, fetch)
+
+    def invalidate(self, endpoint: str, key: str = None):
+        """Drop one cached response, or every response for an endpoint"""
+        if key is not None:
+            self.memory.pop((endpoint, key))
+        else:
+            for cached_key in self.memory.keys():
+                if cached_key[0] == endpoint:
+                    self.memory.pop(cached_key)
+
+        if self._db is not None:
+            with self._db_lock:
+                if key is not None:
+                    self._db.execute("DELETE FROM responses WHERE endpoint = ? AND key = ?",
+                                     (endpoint, key))
+                else:
+                    self._db.execute("DELETE FROM responses WHERE endpoint = ?", (endpoint,))
+                self._db.commit()
+
+    def clear(self):
+        """Drop every cached response"""
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """Return in-memory cache statistics"""
+        return self.memory.get_stats()
+
+    def _fetch_and_store(self, endpoint: str, key: str, fetch: Callable[[], Any]) -> Any:
+        value = fetch()
+        entry = (value, time.time())
+        self.memory.set((endpoint, key), entry)
+        self._store(endpoint, key, entry)
+        return value
+
+    def _refresh_in_background(self, endpoint: str, key: str, fetch: Callable[[], Any]):
+        """Revalidate a stale entry once, without blocking the caller"""
+        with self._refresh_lock:
+            if (endpoint, key) in self._refreshing:
+                return
+            self._refreshing.add((endpoint, key))
+
+        def refresh():
+            try:
+                self._fetch_and_store(endpoint, key, fetch)
+            except Exception as e:
+                print(f"Background refresh failed for {endpoint}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard((endpoint, key))
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _load(self, endpoint: str, key: str):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM responses WHERE endpoint = ? AND key = ?",
+                    (endpoint, key)
+                ).fetchone()
+            if row:
+                return json.loads(row[0]), row[1]
+        except Exception as e:
+            print(f"Response cache read error: {e}")
+        return None
+
+    def _store(self, endpoint: str, key: str, entry):
+        if self._db is None:
+            return
+        value, stored_at = entry
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (endpoint, key, value, stored_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (endpoint, key, json.dumps(value), stored_at)
+                )
+                self._db.commit()
+        except Exception as e:
+            print(f"Response cache write error: {e}")
@@ -0,0 +1,178 @@
+# sentiment.py
+"""
+Lexicon-based sentiment scoring shared by NLPProcessor, AgentEvaluator and
+the MCP 'analyze_text' tool. Lexicons are hashed (frozenset/dict), negations
+such as "not good" flip the polarity of the following words, and whole
+batches of texts are scored with NumPy token-weight arrays.
+"""
+import string
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+POSITIVE_WORDS = frozenset([
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
+    'happy', 'pleased', 'satisfied', 'love', 'like', 'best', 'perfect',
+    'awesome', 'brilliant', 'superb', 'outstanding', 'nice', 'beautiful'
+])
+
+NEGATIVE_WORDS = frozenset([
+    'bad', 'terrible', 'awful', 'horrible', 'poor', 'worst', 'hate',
+    'dislike', 'disappointed', 'angry', 'sad', 'frustrated', 'annoyed',
+    'upset', 'unhappy', 'useless', 'boring', 'dull', 'slow'
+])
+
+# Apostrophes are dropped during tokenization, so "don't" is matched as "dont"
+NEGATIONS = frozenset([
+    'not', 'no', 'never', 'nothing', 'hardly', 'barely', 'cannot',
+    'dont', 'doesnt', 'didnt', 'isnt', 'wasnt', 'arent', 'wont',
+    'cant', 'couldnt', 'shouldnt', 'wouldnt'
+])
+
+# A negation affects sentiment words up to this many tokens after it
+NEGATION_WINDOW = 3
+
+# Tokenization: lowercase, drop apostrophes, turn punctuation and digits into spaces, split
+_TOKEN_TABLE = str.maketrans(
+    {ch: ' ' for ch in string.punctuation.replace("'", '') + string.digits}
+)
+_TOKEN_TABLE.update({ord("'"): None, ord('\u2019'): None})
+
+DOC_SEPARATOR = '\x00'
+_SEPARATOR_ID = -1
+
+
+class SentimentAnalyzer:
+    """Scores text against weighted positive and negative lexicons"""
+
+    def __init__(self, positive_words: Iterable[str] = POSITIVE_WORDS,
+                 negative_words: Iterable[str] = NEGATIVE_WORDS,
+                 weights: Optional[Dict[str, float]] = None,
+                 negations: Iterable[str] = NEGATIONS):
+        self.positive_words = frozenset(positive_words)
+        self.negative_words = frozenset(negative_words)
+        self.negations = frozenset(word.translate(_TOKEN_TABLE) for word in negations)
+
+        # Signed weight per lexicon word; positive words > 0, negative words < 0
+        self.lexicon = {word: 1.0 for word in self.positive_words}
+        self.lexicon.update({word: -1.0 for word in self.negative_words})
+        if weights:
+            self.lexicon.update(weights)
+
+        # Token ids for the batch path: 0 = neutral word, 1 = negation
+        self._token_ids = {word: i + 2 for i, word in enumerate(self.lexicon)}
+        for word in self.negations:
+            self._token_ids[word] = 1
+        self._token_ids[DOC_SEPARATOR] = _SEPARATOR_ID
+        self._weights = np.zeros(len(self.lexicon) + 2, dtype=np.float64)
+        self._weights[2:] = list(self.lexicon.values())
+
+    def tokenize(self, text: str) -> List[str]:
+        return text.lower().translate(_TOKEN_TABLE).split()
+
+    def analyze(self, text: str) -> Dict:
+        """Analyze the sentiment of a single text"""
+        words = self.tokenize(text)
+        positive = 0.0
+        negative = 0.0
+        negated_until = -1
+
+        for i, word in enumerate(words):
+            if word in self.negations:
+                negated_until = i + NEGATION_WINDOW
+                continue
+            weight = self.lexicon.get(word)
+            if weight is None:
+                continue
+            if i <= negated_until:
+                weight = -weight
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+
+        return self._result(positive, negative, len(words))
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze the sentiment of many texts at once"""
+        if not texts:
+            return []
+
+        # Tokenize the whole batch in one pass; DOC_SEPARATOR marks text boundaries
+        separator = f" {DOC_SEPARATOR} "
+        joined = separator.join(texts)
+        if joined.count(DOC_SEPARATOR) != len(texts) - 1:
+            joined = separator.join(text.replace(DOC_SEPARATOR, '') for text in texts)
+        tokens = self.tokenize(joined)
+
+        get_id = self._token_ids.get
+        ids = np.fromiter(map(get_id, tokens, repeat(0)), dtype=np.int64, count=len(tokens))
+        is_separator = ids == _SEPARATOR_ID
+        doc_index = np.cumsum(is_separator)[~is_separator]
+        ids = ids[~is_separator]
+        lengths = np.bincount(doc_index, minlength=len(texts))
+
+        if not len(ids):
+            return [self._result(0.0, 0.0, 0) for _ in texts]
+
+        # A token is negated if a negation occurs in the preceding window of the same text
+        is_negation = ids == 1
+        negated = np.zeros(len(ids), dtype=bool)
+        for offset in range(1, NEGATION_WINDOW + 1):
+            if offset >= len(ids):
+                break
+            negated[offset:] |= is_negation[:-offset] & (doc_index[offset:] == doc_index[:-offset])
+
+        signed = self._weights[ids] * np.where(negated, -1.0, 1.0)
+        positive = np.bincount(doc_index, weights=np.clip(signed, 0, None), minlength=len(texts))
+        negative = np.bincount(doc_index, weights=np.clip(-signed, 0, None), minlength=len(texts))
+
+        result = self._result
+        return [
+            result(pos, neg, length)
+            for pos, neg, length in zip(positive.tolist(), negative.tolist(), lengths.tolist())
+        ]
+
+    @staticmethod
+    def _result(positive: float, negative: float, word_count: int) -> Dict:
+        """Turn weighted counts into the sentiment dict used across the assistant"""
+        if positive > negative:
+            sentiment_score = positive / word_count if word_count else 0
+            return {
+                'type': 'positive',
+                'score': min(sentiment_score * 10, 1.0),
+                'confidence': 0.7 + (positive * 0.1)
+            }
+        elif negative > positive:
+            sentiment_score = negative / word_count if word_count else 0
+            return {
+                'type': 'negative',
+                'score': min(sentiment_score * 10, 1.0),
+                'confidence': 0.7 + (negative * 0.1)
+            }
+        else:
+            return {
+                'type': 'neutral',
+                'score': 0.5,
+                'confidence': 0.6
+            }
+
+
+_default_analyzer = None
+
+
+def get_analyzer() -> SentimentAnalyzer:
+    """Shared analyzer with the default lexicons"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = SentimentAnalyzer()
+    return _default_analyzer
+
+
+def analyze_sentiment(text: str) -> Dict:
+    return get_analyzer().analyze(text)
+
+
+def analyze_sentiment_batch(texts: List[str]) -> List[Dict]:
+    return get_analyzer().analyze_batch(texts)
@@ -0,0 +1,130 @@
+# task_executor.py
+"""
+Executor for multi-step commands produced by NLPProcessor.break_into_steps.
+Steps run on a worker pool as soon as the steps they depend on have
+finished, highest priority first, and completion events are reported back
+through a callback and an event queue the voice loop can poll.
+"""
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+
+class TaskExecutor:
+    """
+    Runs steps shaped like {'step_number': 1, 'depends_on': [], 'priority': 5, ...}.
+    `handler(step)` performs one step and returns its result; an exception
+    marks the step as failed and skips every step that depends on it.
+    Lower priority numbers run first.
+    """
+
+    def __init__(self, handler: Callable[[Dict], object], max_workers: int = 4,
+                 on_event: Optional[Callable[[Dict], None]] = None):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.events = queue.Queue()
+
+    def run(self, steps: List[Dict], timeout: Optional[float] = None) -> Dict[int, Dict]:
+        """
+        Execute steps and block until all of them finished, failed or were
+        skipped. Returns a dict of step_number -> outcome.
+        """
+        by_number = {step['step_number']: step for step in steps}
+        waiting_on = {}
+        dependents = {number: [] for number in by_number}
+        for number, step in by_number.items():
+            deps = [dep for dep in step.get('depends_on', []) if dep in by_number]
+            waiting_on[number] = set(deps)
+            for dep in deps:
+                dependents[dep].append(number)
+
+        ready = []
+        for number, deps in waiting_on.items():
+            if not deps:
+                heapq.heappush(ready, (by_number[number].get('priority', 5), number))
+
+        outcomes = {}
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task_executor")
+        try:
+            running = {}
+            while ready or running:
+                while ready and len(running) < self.max_workers:
+                    _, number = heapq.heappop(ready)
+                    running[pool.submit(self.handler, by_number[number])] = number
+
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    for future, number in running.items():
+                        future.cancel()
+                        outcomes[number] = {'status': 'timeout', 'result': None, 'error': 'Timed out'}
+                        self._emit('step_timeout', by_number[number], error='Timed out')
+                    break
+
+                for future in done:
+                    number = running.pop(future)
+                    step = by_number[number]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        outcomes[number] = {'status': 'failed', 'result': None, 'error': str(e)}
+                        self._emit('step_failed', step, error=str(e))
+                        self._skip_dependents(number, dependents, by_number, outcomes)
+                        continue
+
+                    outcomes[number] = {'status': 'done', 'result': result, 'error': None}
+                    self._emit('step_completed', step, result=result)
+                    for dependent in dependents[number]:
+                        waiting_on[dependent].discard(number)
+                        if not waiting_on[dependent] and dependent not in outcomes:
+                            heapq.heappush(ready, (by_number[dependent].get('priority', 5), dependent))
+        finally:
+            # Do not wait for timed-out steps
+            pool.shutdown(wait=False)
+
+        for number in by_number:
+            if number not in outcomes:
+                outcomes[number] = {'status': 'skipped', 'result': None, 'error': 'Not started'}
+
+        self._emit('task_completed', None, result=outcomes)
+        return outcomes
+
+    def run_in_background(self, steps: List[Dict], timeout: Optional[float] = None) -> threading.Thread:
+        """Run steps on a daemon thread; progress arrives through events"""
+        thread = threading.Thread(target=self.run, args=(steps, timeout), daemon=True)
+        thread.start()
+        return thread
+
+    def _skip_dependents(self, number, dependents, by_number, outcomes):
+        """Mark every step that (transitively) depends on a failed step as skipped"""
+        pending = list(dependents[number])
+        while pending:
+            dependent = pending.pop()
+            if dependent in outcomes:
+                continue
+            error = f"Step {number} failed"
+            outcomes[dependent] = {'status': 'skipped', 'result': None, 'error': error}
+            self._emit('step_skipped', by_number[dependent], error=error)
+            pending.extend(dependents[dependent])
+
+    def _emit(self, event_type: str, step: Optional[Dict], result=None, error: str = None):
+        event = {
+            'event': event_type,
+            'step_number': step['step_number'] if step else None,
+            'step': step,
+            'result': result,
+            'error': error,
+            'timestamp': time.time()
+        }
+        self.events.put(event)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"[Task Event Error]: {e}")